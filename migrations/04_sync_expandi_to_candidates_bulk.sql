@@ -0,0 +1,194 @@
+-- =============================================================================
+-- Migration: Bulk Expandi -> Candidates Sync
+-- Created: 2026-10-18
+--
+-- Set-based counterparts of sync_expandi_to_candidates(p_expandi_id).
+-- The dedup cascade is resolved for the whole batch with joins:
+--   1. expandi_id (already linked)
+--   2. linkedin_url match
+--   3. email match (case-insensitive)
+-- and merges / inserts are applied in a few statements.
+--
+-- Rows in a batch can affect each other when run one at a time (two rows
+-- with the same profile_link or email, or two rows resolving to the same
+-- candidate). Those rows are marked as contended and run through the
+-- per-row function in array order, so the end result is the same as calling
+-- sync_expandi_to_candidates() for each id in order. An id repeated in the
+-- array is synced once; its later elements report 'linked' (or 'not_found'),
+-- as the repeated per-row calls would, so results still line up with the
+-- input by position.
+--
+-- Functions:
+--   sync_expandi_to_candidates_many(ids)  -> one row per id, in array order
+--   sync_expandi_to_candidates_bulk(ids)  -> outcome counts
+--   sync_expandi_to_candidates_since(ts)  -> outcome counts for rows changed since ts
+--
+-- Outcomes: linked, linkedin, email, inserted, not_found
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION sync_expandi_to_candidates_many(p_expandi_ids BIGINT[])
+RETURNS TABLE (expandi_id BIGINT, candidate_id UUID, action TEXT)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_id BIGINT;
+    v_linked BOOLEAN;
+BEGIN
+    DROP TABLE IF EXISTS _expandi_sync;
+    CREATE TEMP TABLE _expandi_sync ON COMMIT DROP AS
+    SELECT DISTINCT ON (ids.id)
+        ids.id,
+        ids.ord,
+        e.id IS NULL AS missing,
+        e.first_name, e.last_name, e.email, e.phone, e.profile_link,
+        e.job_title, e.company_name, e.location,
+        e.contact_status, e.conversation_status, e.concat_tags,
+        e.connected_at, e.invited_at, e.image_link,
+        NULL::UUID AS candidate_id,
+        NULL::TEXT AS action,
+        FALSE AS contended
+    FROM unnest(p_expandi_ids) WITH ORDINALITY AS ids(id, ord)
+    LEFT JOIN expandi_network e ON e.id = ids.id
+    ORDER BY ids.id, ids.ord;
+
+    UPDATE _expandi_sync SET action = 'not_found' WHERE missing;
+
+    -- Check 1: Already linked by expandi_id
+    UPDATE _expandi_sync s SET candidate_id = c.id, action = 'linked'
+    FROM candidates c
+    WHERE c.expandi_id = s.id AND NOT s.missing;
+
+    -- Check 2: LinkedIn URL match (an arbitrary candidate if several match,
+    -- as with SELECT INTO in the per-row function)
+    UPDATE _expandi_sync s SET candidate_id = c.id, action = 'linkedin'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.profile_link IS NOT NULL
+      AND c.linkedin_url = s.profile_link;
+
+    -- Check 3: Email match (case-insensitive)
+    UPDATE _expandi_sync s SET candidate_id = c.id, action = 'email'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.email IS NOT NULL
+      AND LOWER(c.email) = LOWER(s.email);
+
+    -- Rows sharing a profile_link, email or target candidate with another row
+    -- in the batch depend on processing order.
+    UPDATE _expandi_sync s SET contended = TRUE
+    FROM (
+        SELECT id,
+            CASE WHEN profile_link IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY profile_link) END AS n_link,
+            CASE WHEN email IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY LOWER(email)) END AS n_email,
+            CASE WHEN candidate_id IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY candidate_id) END AS n_candidate
+        FROM _expandi_sync
+        WHERE NOT missing
+    ) k
+    WHERE k.id = s.id
+      AND (k.n_link > 1 OR k.n_email > 1 OR k.n_candidate > 1);
+
+    -- Match found: merge
+    UPDATE candidates SET
+        first_name      = COALESCE(candidates.first_name, s.first_name),
+        last_name       = COALESCE(candidates.last_name, s.last_name),
+        email           = COALESCE(candidates.email, s.email),
+        phone           = COALESCE(candidates.phone, s.phone),
+        linkedin_url    = COALESCE(candidates.linkedin_url, s.profile_link),
+        current_title   = COALESCE(s.job_title, candidates.current_title),
+        current_company = COALESCE(s.company_name, candidates.current_company),
+        location        = COALESCE(s.location, candidates.location),
+        contact_status  = s.contact_status,
+        conversation_status = s.conversation_status,
+        concat_tags     = s.concat_tags,
+        connected_at    = COALESCE(s.connected_at, candidates.connected_at),
+        invited_at      = COALESCE(s.invited_at, candidates.invited_at),
+        image_link      = COALESCE(candidates.image_link, s.image_link),
+        source          = CASE WHEN s.action = 'linked' THEN candidates.source ELSE 'both' END,
+        expandi_id      = s.id,
+        match_method    = CASE WHEN s.action = 'linked' THEN candidates.match_method ELSE s.action END,
+        updated_at      = NOW()
+    FROM _expandi_sync s
+    WHERE candidates.id = s.candidate_id
+      AND NOT s.contended;
+
+    -- No match: insert new candidates
+    WITH inserted AS (
+        INSERT INTO candidates (
+            first_name, last_name, email, phone, linkedin_url,
+            current_title, current_company, location,
+            contact_status, conversation_status, concat_tags,
+            connected_at, invited_at, image_link,
+            source, expandi_id, match_method,
+            created_at, updated_at
+        )
+        SELECT
+            s.first_name, s.last_name, s.email, s.phone, s.profile_link,
+            s.job_title, s.company_name, s.location,
+            s.contact_status, s.conversation_status, s.concat_tags,
+            s.connected_at, s.invited_at, s.image_link,
+            'expandi', s.id, NULL,
+            NOW(), NOW()
+        FROM _expandi_sync s
+        WHERE s.action IS NULL
+          AND NOT s.contended
+        ORDER BY s.ord
+        RETURNING id, expandi_id
+    )
+    UPDATE _expandi_sync s SET candidate_id = i.id, action = 'inserted'
+    FROM inserted i
+    WHERE s.id = i.expandi_id;
+
+    -- Contended rows: one at a time, in array order
+    FOR v_id IN SELECT id FROM _expandi_sync WHERE contended ORDER BY ord LOOP
+        v_linked := EXISTS (SELECT 1 FROM candidates c WHERE c.expandi_id = v_id);
+        UPDATE _expandi_sync s SET candidate_id = sync_expandi_to_candidates(v_id)
+        WHERE s.id = v_id;
+        UPDATE _expandi_sync s SET action = CASE
+                WHEN v_linked THEN 'linked'
+                ELSE COALESCE(c.match_method, 'inserted')
+            END
+        FROM candidates c
+        WHERE s.id = v_id AND c.id = s.candidate_id;
+    END LOOP;
+
+    -- One row per input element; later copies of an id report 'linked', as a
+    -- second per-row call would
+    RETURN QUERY
+    SELECT u.id, s.candidate_id,
+           CASE WHEN u.ord = s.ord OR s.missing THEN s.action ELSE 'linked' END
+    FROM unnest(p_expandi_ids) WITH ORDINALITY AS u(id, ord)
+    JOIN _expandi_sync s ON s.id IS NOT DISTINCT FROM u.id
+    ORDER BY u.ord;
+END;
+$$;
+
+
+-- sync_expandi_to_candidates_bulk: outcome counts for a batch of expandi ids
+CREATE OR REPLACE FUNCTION sync_expandi_to_candidates_bulk(p_expandi_ids BIGINT[])
+RETURNS TABLE (action TEXT, row_count BIGINT)
+LANGUAGE sql
+AS $$
+    SELECT r.action, COUNT(*)
+    FROM sync_expandi_to_candidates_many(p_expandi_ids) r
+    GROUP BY r.action
+    ORDER BY r.action;
+$$;
+
+
+-- sync_expandi_to_candidates_since: re-sync every expandi row changed since p_since
+CREATE OR REPLACE FUNCTION sync_expandi_to_candidates_since(p_since TIMESTAMPTZ)
+RETURNS TABLE (action TEXT, row_count BIGINT)
+LANGUAGE sql
+AS $$
+    SELECT *
+    FROM sync_expandi_to_candidates_bulk(ARRAY(
+        SELECT e.id
+        FROM expandi_network e
+        WHERE e.updated_at >= p_since OR e.created_at >= p_since
+        ORDER BY e.id
+    ));
+$$;
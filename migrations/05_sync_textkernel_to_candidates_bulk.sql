@@ -0,0 +1,262 @@
+-- =============================================================================
+-- Migration: Bulk Textkernel -> Candidates Sync
+-- Created: 2026-10-18
+--
+-- Set-based counterparts of sync_textkernel_to_candidates(p_textkernel_id).
+-- Instead of seven queries per resume, the contact, first email, first phone,
+-- current position, location and top-20 skills are computed for every resume
+-- in the batch with DISTINCT ON / window functions, the dedup cascade
+--   1. textkernel_id (already linked)
+--   2. email match (case-insensitive)
+--   3. first_name + last_name match
+-- is resolved with joins, and merges / inserts are applied set-wise.
+--
+-- As in 04_sync_expandi_to_candidates_bulk.sql, resumes that share an email,
+-- a name or a target candidate with another resume in the batch are run
+-- through the per-row function in array order. A resume id repeated in the
+-- array is synced once; its later elements report 'linked' (or 'not_found'),
+-- as the repeated per-row calls would, so results still line up with the
+-- input by position.
+--
+-- Functions:
+--   sync_textkernel_to_candidates_many(ids)  -> one row per resume id, in array order
+--   sync_textkernel_to_candidates_bulk(ids)  -> outcome counts
+--   sync_textkernel_to_candidates_since(ts)  -> outcome counts for resumes created since ts
+--
+-- Outcomes: linked, email, name, inserted, not_found
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION sync_textkernel_to_candidates_many(p_textkernel_ids UUID[])
+RETURNS TABLE (textkernel_id UUID, candidate_id UUID, action TEXT)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_id UUID;
+    v_linked BOOLEAN;
+BEGIN
+    DROP TABLE IF EXISTS _textkernel_sync;
+    CREATE TEMP TABLE _textkernel_sync ON COMMIT DROP AS
+    WITH ids AS (
+        SELECT DISTINCT ON (id) id, ord
+        FROM unnest(p_textkernel_ids) WITH ORDINALITY AS u(id, ord)
+        ORDER BY id, ord
+    ),
+    contact AS (
+        SELECT DISTINCT ON (ct.resume_id)
+            ct.resume_id,
+            ct.given_name,
+            ct.family_name,
+            -- Same row-null test as "v_contact IS NOT NULL" in the per-row function
+            ct IS NOT NULL AS contact_complete,
+            NULLIF(CONCAT_WS(', ',
+                NULLIF(ct.municipality, ''),
+                NULLIF(ARRAY_TO_STRING(ct.regions, ', '), ''),
+                NULLIF(ct.country_code, '')
+            ), '') AS location
+        FROM textkernel_contact ct
+        WHERE ct.resume_id IN (SELECT id FROM ids)
+    ),
+    email AS (
+        SELECT DISTINCT ON (resume_id) resume_id, email
+        FROM textkernel_emails
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, id
+    ),
+    phone AS (
+        SELECT DISTINCT ON (resume_id) resume_id, normalized AS phone
+        FROM textkernel_phones
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, id
+    ),
+    current_position AS (
+        SELECT DISTINCT ON (resume_id)
+            resume_id,
+            job_title_raw AS current_title,
+            employer_name_raw AS current_company
+        FROM textkernel_positions
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, is_current DESC NULLS LAST, end_date DESC NULLS FIRST, start_date DESC NULLS LAST
+    ),
+    skills AS (
+        SELECT resume_id, STRING_AGG(normalized_name, ', ' ORDER BY normalized_name) AS skills
+        FROM (
+            SELECT resume_id, normalized_name,
+                   ROW_NUMBER() OVER (PARTITION BY resume_id ORDER BY id) AS rn
+            FROM textkernel_skills
+            WHERE resume_id IN (SELECT id FROM ids) AND normalized_name IS NOT NULL
+        ) ranked
+        WHERE rn <= 20
+        GROUP BY resume_id
+    )
+    SELECT
+        ids.id,
+        ids.ord,
+        r.id IS NULL AS missing,
+        COALESCE(c.contact_complete, FALSE) AS contact_complete,
+        c.given_name, c.family_name,
+        e.email, p.phone,
+        pos.current_title, pos.current_company,
+        CASE WHEN c.contact_complete THEN c.location END AS location,
+        r.professional_summary, r.highest_degree_normalized,
+        r.current_management_level, r.management_score,
+        r.months_work_experience, r.experience_description,
+        s.skills, r.file_name,
+        NULL::UUID AS candidate_id,
+        NULL::TEXT AS action,
+        FALSE AS contended
+    FROM ids
+    LEFT JOIN textkernel_resumes r ON r.id = ids.id
+    LEFT JOIN contact c ON c.resume_id = ids.id
+    LEFT JOIN email e ON e.resume_id = ids.id
+    LEFT JOIN phone p ON p.resume_id = ids.id
+    LEFT JOIN current_position pos ON pos.resume_id = ids.id
+    LEFT JOIN skills s ON s.resume_id = ids.id;
+
+    UPDATE _textkernel_sync SET action = 'not_found' WHERE missing;
+
+    -- Check 1: Already linked by textkernel_id
+    UPDATE _textkernel_sync s SET candidate_id = c.id, action = 'linked'
+    FROM candidates c
+    WHERE c.textkernel_id = s.id AND NOT s.missing;
+
+    -- Check 2: Email match
+    UPDATE _textkernel_sync s SET candidate_id = c.id, action = 'email'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.email IS NOT NULL
+      AND LOWER(c.email) = LOWER(s.email);
+
+    -- Check 3: Name match (first + last, both non-null)
+    UPDATE _textkernel_sync s SET candidate_id = c.id, action = 'name'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.contact_complete
+      AND s.given_name IS NOT NULL
+      AND s.family_name IS NOT NULL
+      AND LOWER(c.first_name) = LOWER(s.given_name)
+      AND LOWER(c.last_name) = LOWER(s.family_name);
+
+    -- Rows sharing an email, name or target candidate with another row in the
+    -- batch depend on processing order.
+    UPDATE _textkernel_sync s SET contended = TRUE
+    FROM (
+        SELECT id,
+            CASE WHEN email IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY LOWER(email)) END AS n_email,
+            CASE WHEN given_name IS NULL OR family_name IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY LOWER(given_name), LOWER(family_name)) END AS n_name,
+            CASE WHEN candidate_id IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY candidate_id) END AS n_candidate
+        FROM _textkernel_sync
+        WHERE NOT missing
+    ) k
+    WHERE k.id = s.id
+      AND (k.n_email > 1 OR k.n_name > 1 OR k.n_candidate > 1);
+
+    -- Match found: merge
+    UPDATE candidates SET
+        first_name              = COALESCE(candidates.first_name, s.given_name),
+        last_name               = COALESCE(candidates.last_name, s.family_name),
+        email                   = COALESCE(candidates.email, s.email),
+        phone                   = COALESCE(candidates.phone, s.phone),
+        current_title           = COALESCE(s.current_title, candidates.current_title),
+        current_company         = COALESCE(s.current_company, candidates.current_company),
+        location                = COALESCE(candidates.location, s.location),
+        professional_summary    = COALESCE(s.professional_summary, candidates.professional_summary),
+        highest_degree          = COALESCE(s.highest_degree_normalized, candidates.highest_degree),
+        current_management_level = COALESCE(s.current_management_level, candidates.current_management_level),
+        management_score        = COALESCE(s.management_score, candidates.management_score),
+        months_work_experience  = COALESCE(s.months_work_experience, candidates.months_work_experience),
+        experience_description  = COALESCE(s.experience_description, candidates.experience_description),
+        skills_summary          = COALESCE(s.skills, candidates.skills_summary),
+        cv_file_name            = COALESCE(s.file_name, candidates.cv_file_name),
+        source                  = CASE WHEN s.action = 'linked' THEN candidates.source ELSE 'both' END,
+        textkernel_id           = s.id,
+        match_method            = CASE WHEN s.action = 'linked' THEN candidates.match_method ELSE s.action END,
+        updated_at              = NOW()
+    FROM _textkernel_sync s
+    WHERE candidates.id = s.candidate_id
+      AND NOT s.contended;
+
+    -- No match: insert new candidates
+    WITH inserted AS (
+        INSERT INTO candidates (
+            first_name, last_name, email, phone,
+            current_title, current_company, location,
+            professional_summary, highest_degree,
+            current_management_level, management_score,
+            months_work_experience, experience_description,
+            skills_summary, cv_file_name,
+            source, textkernel_id, match_method,
+            created_at, updated_at
+        )
+        SELECT
+            s.given_name, s.family_name, s.email, s.phone,
+            s.current_title, s.current_company, s.location,
+            s.professional_summary, s.highest_degree_normalized,
+            s.current_management_level, s.management_score,
+            s.months_work_experience, s.experience_description,
+            s.skills, s.file_name,
+            'textkernel', s.id, NULL,
+            NOW(), NOW()
+        FROM _textkernel_sync s
+        WHERE s.action IS NULL
+          AND NOT s.contended
+        ORDER BY s.ord
+        RETURNING id, textkernel_id
+    )
+    UPDATE _textkernel_sync s SET candidate_id = i.id, action = 'inserted'
+    FROM inserted i
+    WHERE s.id = i.textkernel_id;
+
+    -- Contended rows: one at a time, in array order
+    FOR v_id IN SELECT id FROM _textkernel_sync WHERE contended ORDER BY ord LOOP
+        v_linked := EXISTS (SELECT 1 FROM candidates c WHERE c.textkernel_id = v_id);
+        UPDATE _textkernel_sync s SET candidate_id = sync_textkernel_to_candidates(v_id)
+        WHERE s.id = v_id;
+        UPDATE _textkernel_sync s SET action = CASE
+                WHEN v_linked THEN 'linked'
+                ELSE COALESCE(c.match_method, 'inserted')
+            END
+        FROM candidates c
+        WHERE s.id = v_id AND c.id = s.candidate_id;
+    END LOOP;
+
+    -- One row per input element; later copies of an id report 'linked', as a
+    -- second per-row call would
+    RETURN QUERY
+    SELECT u.id, s.candidate_id,
+           CASE WHEN u.ord = s.ord OR s.missing THEN s.action ELSE 'linked' END
+    FROM unnest(p_textkernel_ids) WITH ORDINALITY AS u(id, ord)
+    JOIN _textkernel_sync s ON s.id IS NOT DISTINCT FROM u.id
+    ORDER BY u.ord;
+END;
+$$;
+
+
+-- sync_textkernel_to_candidates_bulk: outcome counts for a batch of resume ids
+CREATE OR REPLACE FUNCTION sync_textkernel_to_candidates_bulk(p_textkernel_ids UUID[])
+RETURNS TABLE (action TEXT, row_count BIGINT)
+LANGUAGE sql
+AS $$
+    SELECT r.action, COUNT(*)
+    FROM sync_textkernel_to_candidates_many(p_textkernel_ids) r
+    GROUP BY r.action
+    ORDER BY r.action;
+$$;
+
+
+-- sync_textkernel_to_candidates_since: sync every resume created since p_since
+CREATE OR REPLACE FUNCTION sync_textkernel_to_candidates_since(p_since TIMESTAMPTZ)
+RETURNS TABLE (action TEXT, row_count BIGINT)
+LANGUAGE sql
+AS $$
+    SELECT *
+    FROM sync_textkernel_to_candidates_bulk(ARRAY(
+        SELECT r.id
+        FROM textkernel_resumes r
+        WHERE r.created_at >= p_since
+        ORDER BY r.created_at, r.id
+    ));
+$$;
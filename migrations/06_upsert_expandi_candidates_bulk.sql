@@ -0,0 +1,159 @@
+-- =============================================================================
+-- Migration: Bulk Expandi Upsert
+-- Created: 2026-10-18
+--
+-- upsert_expandi_candidates(payloads JSONB): array counterpart of
+-- upsert_expandi_candidate(payload JSONB) for webhook bursts and CSV backfills.
+-- All payloads are upserted into expandi_network with a single
+-- INSERT ... SELECT FROM jsonb_to_record(...) ... ON CONFLICT, then the affected
+-- rows are synced to candidates with sync_expandi_to_candidates_many().
+--
+-- Payloads that share an id are collapsed into one row first, applying them in
+-- array order with the same rules as repeated single upserts: for columns the
+-- ON CONFLICT clause updates, the last non-null value wins; other columns keep
+-- the value from the first payload. The collapsed row is synced once.
+--
+-- Returns a JSONB array, in payload order:
+--   [{"expandi_id": 12345, "candidate_id": "uuid", "action": "inserted"}, ...]
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION upsert_expandi_candidates(payloads JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_ids BIGINT[];
+    v_result JSONB;
+BEGIN
+    IF payloads IS NULL OR jsonb_typeof(payloads) <> 'array' THEN
+        RAISE EXCEPTION 'upsert_expandi_candidates expects a JSONB array';
+    END IF;
+
+    WITH p AS (
+        SELECT r.*, a.ord
+        FROM jsonb_array_elements(payloads) WITH ORDINALITY AS a(payload, ord),
+        LATERAL jsonb_to_record(a.payload) AS r(
+            id BIGINT,
+            first_name TEXT,
+            last_name TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            profile_link TEXT,
+            public_identifier TEXT,
+            profile_link_public_identifier TEXT,
+            image_link TEXT,
+            object_urn BIGINT,
+            job_title TEXT,
+            company_name TEXT,
+            company_universal_name TEXT,
+            company_website TEXT,
+            employee_count_start INTEGER,
+            employee_count_end INTEGER,
+            industries TEXT,
+            location TEXT,
+            follower_count INTEGER,
+            contact_status TEXT,
+            conversation_status TEXT,
+            thread TEXT,
+            invited_at TIMESTAMPTZ,
+            connected_at TIMESTAMPTZ,
+            concat_tags TEXT,
+            owned_by TEXT,
+            source_file TEXT,
+            source TEXT
+        )
+    ),
+    collapsed AS (
+        SELECT
+            id,
+            MIN(ord) AS ord,
+            (ARRAY_AGG(first_name ORDER BY ord DESC) FILTER (WHERE first_name IS NOT NULL))[1] AS first_name,
+            (ARRAY_AGG(last_name ORDER BY ord DESC) FILTER (WHERE last_name IS NOT NULL))[1] AS last_name,
+            (ARRAY_AGG(email ORDER BY ord DESC) FILTER (WHERE email IS NOT NULL))[1] AS email,
+            (ARRAY_AGG(phone ORDER BY ord DESC) FILTER (WHERE phone IS NOT NULL))[1] AS phone,
+            (ARRAY_AGG(address ORDER BY ord DESC) FILTER (WHERE address IS NOT NULL))[1] AS address,
+            (ARRAY_AGG(profile_link ORDER BY ord DESC) FILTER (WHERE profile_link IS NOT NULL))[1] AS profile_link,
+            (ARRAY_AGG(public_identifier ORDER BY ord))[1] AS public_identifier,
+            (ARRAY_AGG(profile_link_public_identifier ORDER BY ord))[1] AS profile_link_public_identifier,
+            (ARRAY_AGG(image_link ORDER BY ord DESC) FILTER (WHERE image_link IS NOT NULL))[1] AS image_link,
+            (ARRAY_AGG(object_urn ORDER BY ord DESC) FILTER (WHERE object_urn IS NOT NULL))[1] AS object_urn,
+            (ARRAY_AGG(job_title ORDER BY ord DESC) FILTER (WHERE job_title IS NOT NULL))[1] AS job_title,
+            (ARRAY_AGG(company_name ORDER BY ord DESC) FILTER (WHERE company_name IS NOT NULL))[1] AS company_name,
+            (ARRAY_AGG(company_universal_name ORDER BY ord))[1] AS company_universal_name,
+            (ARRAY_AGG(company_website ORDER BY ord))[1] AS company_website,
+            (ARRAY_AGG(employee_count_start ORDER BY ord))[1] AS employee_count_start,
+            (ARRAY_AGG(employee_count_end ORDER BY ord))[1] AS employee_count_end,
+            (ARRAY_AGG(industries ORDER BY ord))[1] AS industries,
+            (ARRAY_AGG(location ORDER BY ord DESC) FILTER (WHERE location IS NOT NULL))[1] AS location,
+            (ARRAY_AGG(follower_count ORDER BY ord))[1] AS follower_count,
+            (ARRAY_AGG(contact_status ORDER BY ord DESC) FILTER (WHERE contact_status IS NOT NULL))[1] AS contact_status,
+            (ARRAY_AGG(conversation_status ORDER BY ord DESC) FILTER (WHERE conversation_status IS NOT NULL))[1] AS conversation_status,
+            (ARRAY_AGG(thread ORDER BY ord))[1] AS thread,
+            (ARRAY_AGG(invited_at ORDER BY ord DESC) FILTER (WHERE invited_at IS NOT NULL))[1] AS invited_at,
+            (ARRAY_AGG(connected_at ORDER BY ord DESC) FILTER (WHERE connected_at IS NOT NULL))[1] AS connected_at,
+            (ARRAY_AGG(concat_tags ORDER BY ord DESC) FILTER (WHERE concat_tags IS NOT NULL))[1] AS concat_tags,
+            (ARRAY_AGG(owned_by ORDER BY ord))[1] AS owned_by,
+            (ARRAY_AGG(source_file ORDER BY ord))[1] AS source_file,
+            (ARRAY_AGG(source ORDER BY ord))[1] AS source
+        FROM p
+        GROUP BY id
+    ),
+    upserted AS (
+        INSERT INTO expandi_network (
+            id, first_name, last_name, email, phone, address,
+            profile_link, public_identifier, profile_link_public_identifier,
+            image_link, object_urn, job_title, company_name,
+            company_universal_name, company_website,
+            employee_count_start, employee_count_end,
+            industries, location, follower_count,
+            contact_status, conversation_status, thread,
+            invited_at, connected_at, concat_tags, owned_by,
+            source_file, source, updated_at
+        )
+        SELECT
+            id, first_name, last_name, email, phone, address,
+            profile_link, public_identifier, profile_link_public_identifier,
+            image_link, object_urn, job_title, company_name,
+            company_universal_name, company_website,
+            employee_count_start, employee_count_end,
+            industries, location, follower_count,
+            contact_status, conversation_status, thread,
+            invited_at, connected_at, concat_tags, owned_by,
+            source_file, source, NOW()
+        FROM collapsed
+        ORDER BY ord
+        ON CONFLICT (id) DO UPDATE SET
+            first_name      = COALESCE(EXCLUDED.first_name, expandi_network.first_name),
+            last_name       = COALESCE(EXCLUDED.last_name, expandi_network.last_name),
+            email           = COALESCE(EXCLUDED.email, expandi_network.email),
+            phone           = COALESCE(EXCLUDED.phone, expandi_network.phone),
+            address         = COALESCE(EXCLUDED.address, expandi_network.address),
+            profile_link    = COALESCE(EXCLUDED.profile_link, expandi_network.profile_link),
+            image_link      = COALESCE(EXCLUDED.image_link, expandi_network.image_link),
+            object_urn      = COALESCE(EXCLUDED.object_urn, expandi_network.object_urn),
+            job_title       = COALESCE(EXCLUDED.job_title, expandi_network.job_title),
+            company_name    = COALESCE(EXCLUDED.company_name, expandi_network.company_name),
+            location        = COALESCE(EXCLUDED.location, expandi_network.location),
+            contact_status  = COALESCE(EXCLUDED.contact_status, expandi_network.contact_status),
+            conversation_status = COALESCE(EXCLUDED.conversation_status, expandi_network.conversation_status),
+            concat_tags     = COALESCE(EXCLUDED.concat_tags, expandi_network.concat_tags),
+            connected_at    = COALESCE(EXCLUDED.connected_at, expandi_network.connected_at),
+            invited_at      = COALESCE(EXCLUDED.invited_at, expandi_network.invited_at),
+            updated_at      = NOW()
+        RETURNING id
+    )
+    SELECT ARRAY(SELECT c.id FROM collapsed c WHERE c.id IN (SELECT id FROM upserted) ORDER BY c.ord)
+    INTO v_ids;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'expandi_id', r.expandi_id,
+               'candidate_id', r.candidate_id,
+               'action', r.action
+           ) ORDER BY r.ord), '[]'::jsonb)
+    INTO v_result
+    FROM sync_expandi_to_candidates_many(v_ids) WITH ORDINALITY AS r(expandi_id, candidate_id, action, ord);
+
+    RETURN v_result;
+END;
+$$;
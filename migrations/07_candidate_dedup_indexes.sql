@@ -0,0 +1,91 @@
+-- =============================================================================
+-- Migration: Indexes for the Candidate Dedup Cascades
+-- Created: 2026-10-18
+--
+-- The sync functions (03_candidate_sync_functions.sql and the bulk variants)
+-- and insert_contact_deduped look candidates / expandi_network rows up by
+-- expressions that had no matching index, so every step was a sequential scan.
+--
+-- candidates:
+--   LOWER(email)                         expandi check 3 / textkernel check 2
+--   LOWER(first_name), LOWER(last_name)  textkernel check 3
+--   (linkedin_url, expandi_id and textkernel_id are covered by the partial
+--   unique indexes the candidates table was created with, see "Deduplication
+--   enforced via partial unique indexes" in jobs_system_breakdown.md.resolved;
+--   the check below reports it if they are missing)
+--
+-- expandi_network:
+--   profile_link, object_urn, LOWER(email),
+--   first_name + last_name + job_title   insert_contact_deduped checks 1-4
+--   created_at, updated_at               incremental dedup index refresh / *_since()
+--
+-- Verify with:
+--   SELECT * FROM explain_candidate_dedup_lookups();
+-- Every row should report uses_index = true.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_candidates_lower_email
+    ON candidates (LOWER(email));
+
+CREATE INDEX IF NOT EXISTS idx_candidates_lower_name
+    ON candidates (LOWER(first_name), LOWER(last_name));
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_profile_link
+    ON expandi_network (profile_link);
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_object_urn
+    ON expandi_network (object_urn);
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_lower_email
+    ON expandi_network (LOWER(email));
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_name_title
+    ON expandi_network (first_name, last_name, job_title);
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_created_at
+    ON expandi_network (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_expandi_network_updated_at
+    ON expandi_network (updated_at);
+
+
+-- explain_candidate_dedup_lookups: EXPLAIN each cascade lookup and report
+-- whether the plan reaches the table through an index.
+CREATE OR REPLACE FUNCTION explain_candidate_dedup_lookups()
+RETURNS TABLE (step TEXT, uses_index BOOLEAN, plan JSONB)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_step RECORD;
+    v_plan JSON;
+BEGIN
+    FOR v_step IN
+        SELECT * FROM (VALUES
+            ('candidates: expandi_id',
+             $q$SELECT id FROM candidates WHERE expandi_id = 0$q$),
+            ('candidates: textkernel_id',
+             $q$SELECT id FROM candidates WHERE textkernel_id = '00000000-0000-0000-0000-000000000000'::uuid$q$),
+            ('candidates: linkedin_url',
+             $q$SELECT id FROM candidates WHERE linkedin_url = 'https://www.linkedin.com/in/x/'$q$),
+            ('candidates: email',
+             $q$SELECT id FROM candidates WHERE LOWER(email) = LOWER('x@example.com')$q$),
+            ('candidates: first_name + last_name',
+             $q$SELECT id FROM candidates WHERE LOWER(first_name) = LOWER('x') AND LOWER(last_name) = LOWER('y') LIMIT 1$q$),
+            ('expandi_network: profile_link',
+             $q$SELECT id FROM expandi_network WHERE profile_link = 'https://www.linkedin.com/in/x/'$q$),
+            ('expandi_network: object_urn',
+             $q$SELECT id FROM expandi_network WHERE object_urn = 0$q$),
+            ('expandi_network: email',
+             $q$SELECT id FROM expandi_network WHERE LOWER(email) = LOWER('x@example.com')$q$),
+            ('expandi_network: first_name + last_name + job_title',
+             $q$SELECT id FROM expandi_network WHERE first_name = 'x' AND last_name = 'y' AND job_title = 'z'$q$)
+        ) AS s(step, query)
+    LOOP
+        EXECUTE 'EXPLAIN (FORMAT JSON) ' || v_step.query INTO v_plan;
+        step := v_step.step;
+        plan := v_plan::jsonb;
+        uses_index := v_plan::text ~ '"Node Type": "(Index Scan|Index Only Scan|Bitmap Index Scan)"';
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,89 @@
+-- =============================================================================
+-- Migration: Resume Latest Dates View
+-- Created: 2026-10-18
+--
+-- Server-side version of scripts/resume_lates_date_extractor/extract_resume_latest_dates.py.
+-- One row per textkernel resume with the latest education / position date for
+-- both output modes, computed in a single aggregate query:
+--
+--   latest_date, latest_date_source, total_dates_found
+--       all dates: education start/end/last_education_date + position start/end
+--   latest_start_date, latest_start_date_source, total_start_dates_found
+--       start dates only
+--
+-- Sources are reported as '<education|position>.<field>'. Ties resolve like
+-- the script, which keeps the first latest date it sees while reading the
+-- education rows and then the position rows, each in id order, and each row's
+-- start_date, end_date, last_education_date in turn. The person name comes
+-- from the resume's contact row with the highest id, since the script lets
+-- later contacts overwrite earlier ones.
+-- =============================================================================
+
+CREATE OR REPLACE VIEW resume_latest_dates AS
+WITH dates AS (
+    SELECT e.resume_id, 'education' AS source, 0 AS source_rank,
+           DENSE_RANK() OVER (PARTITION BY e.resume_id ORDER BY e.id) AS row_rank,
+           f.field, f.field_rank, f.value
+    FROM textkernel_education e
+    CROSS JOIN LATERAL (VALUES
+        ('start_date', 0, e.start_date),
+        ('end_date', 1, e.end_date),
+        ('last_education_date', 2, e.last_education_date)
+    ) AS f(field, field_rank, value)
+    WHERE f.value IS NOT NULL
+
+    UNION ALL
+
+    SELECT p.resume_id, 'position' AS source, 1 AS source_rank,
+           DENSE_RANK() OVER (PARTITION BY p.resume_id ORDER BY p.id) AS row_rank,
+           f.field, f.field_rank, f.value
+    FROM textkernel_positions p
+    CROSS JOIN LATERAL (VALUES
+        ('start_date', 0, p.start_date),
+        ('end_date', 1, p.end_date)
+    ) AS f(field, field_rank, value)
+    WHERE f.value IS NOT NULL
+),
+all_dates AS (
+    SELECT DISTINCT ON (resume_id)
+        resume_id,
+        value AS latest_date,
+        source || '.' || field AS latest_date_source,
+        COUNT(*) OVER (PARTITION BY resume_id) AS total_dates_found
+    FROM dates
+    ORDER BY resume_id, value DESC, source_rank, row_rank, field_rank
+),
+start_dates AS (
+    SELECT DISTINCT ON (resume_id)
+        resume_id,
+        value AS latest_date,
+        source || '.' || field AS latest_date_source,
+        COUNT(*) OVER (PARTITION BY resume_id) AS total_dates_found
+    FROM dates
+    WHERE field = 'start_date'
+    ORDER BY resume_id, value DESC, source_rank, row_rank
+),
+names AS (
+    SELECT DISTINCT ON (resume_id)
+        resume_id,
+        COALESCE(
+            NULLIF(formatted_name, ''),
+            NULLIF(TRIM(CONCAT_WS(' ', given_name, family_name)), '')
+        ) AS person_name
+    FROM textkernel_contact
+    ORDER BY resume_id, id DESC
+)
+SELECT
+    r.id AS resume_id,
+    r.file_name,
+    COALESCE(n.person_name, 'Unknown') AS person_name,
+    a.latest_date,
+    a.latest_date_source,
+    COALESCE(a.total_dates_found, 0) AS total_dates_found,
+    s.latest_date AS latest_start_date,
+    s.latest_date_source AS latest_start_date_source,
+    COALESCE(s.total_dates_found, 0) AS total_start_dates_found
+FROM textkernel_resumes r
+LEFT JOIN names n ON n.resume_id = r.id
+LEFT JOIN all_dates a ON a.resume_id = r.id
+LEFT JOIN start_dates s ON s.resume_id = r.id;
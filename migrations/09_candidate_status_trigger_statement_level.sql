@@ -0,0 +1,162 @@
+-- =============================================================================
+-- Migration: Statement-level candidate status logging
+-- Created: 2026-10-18
+--
+-- Replaces the FOR EACH ROW trigger from 02_candidate_status_trigger.sql.
+-- A bulk stage change (e.g. 500 candidates moved in NocoDB) used to run 500
+-- single-row INSERTs into job_activities; these triggers run once per
+-- statement and write every activity row with one INSERT ... SELECT over the
+-- transition tables.
+--
+-- content, activity_type, created_by and metadata are built with the same
+-- expressions as log_candidate_status_change(), so the rows are identical.
+-- Postgres does not allow transition tables on a trigger with more than one
+-- event, hence one trigger for INSERT and one for UPDATE. UPDATE rows are
+-- paired on job_candidates.id.
+--
+-- log_candidate_status_change() is kept for benchmark_candidate_status_trigger():
+--   SELECT * FROM benchmark_candidate_status_trigger('<job uuid>', 500);
+-- It times the same bulk status update under the old row-level trigger and
+-- the new statement-level triggers, rolling back each run. It swaps the
+-- triggers inside the transaction and so locks job_candidates while it runs.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION log_candidate_status_inserts()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.job_activities (
+        job_id,
+        activity_type,
+        content,
+        created_by,
+        metadata
+    )
+    SELECT
+        n.job_id,
+        'candidate_update',
+        'Candidate added to job with status "' || n.candidate_status || '"',
+        current_user,
+        jsonb_build_object(
+            'candidate_id', n.candidate_id,
+            'status', n.candidate_status
+        )
+    FROM new_rows n;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION log_candidate_status_updates()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Only log actual status changes, not non-status updates
+    INSERT INTO public.job_activities (
+        job_id,
+        activity_type,
+        content,
+        created_by,
+        metadata
+    )
+    SELECT
+        n.job_id,
+        'candidate_update',
+        'Candidate status changed from "' || o.candidate_status || '" to "' || n.candidate_status || '"',
+        current_user,
+        jsonb_build_object(
+            'candidate_id', n.candidate_id,
+            'old_status', o.candidate_status,
+            'new_status', n.candidate_status
+        )
+    FROM old_rows o
+    JOIN new_rows n ON n.id = o.id
+    WHERE o.candidate_status IS DISTINCT FROM n.candidate_status;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trg_candidate_status_change ON public.job_candidates;
+
+DROP TRIGGER IF EXISTS trg_candidate_status_insert ON public.job_candidates;
+CREATE TRIGGER trg_candidate_status_insert
+    AFTER INSERT ON public.job_candidates
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION log_candidate_status_inserts();
+
+DROP TRIGGER IF EXISTS trg_candidate_status_update ON public.job_candidates;
+CREATE TRIGGER trg_candidate_status_update
+    AFTER UPDATE ON public.job_candidates
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION log_candidate_status_updates();
+
+
+-- benchmark_candidate_status_trigger: bulk-update up to p_rows candidates of
+-- one job under each trigger setup, p_runs times, and report the latency.
+-- Every run is rolled back, including the activity rows it wrote.
+CREATE OR REPLACE FUNCTION benchmark_candidate_status_trigger(
+    p_job_id UUID,
+    p_rows INTEGER DEFAULT 500,
+    p_runs INTEGER DEFAULT 3
+)
+RETURNS TABLE (mode TEXT, run INTEGER, rows_updated BIGINT, elapsed_ms NUMERIC)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_start TIMESTAMPTZ;
+    v_elapsed INTERVAL;
+    v_rows BIGINT;
+    v_run INTEGER;
+    -- Typed like the column, so the CASE below is not resolved as text
+    v_new public.job_candidates.candidate_status%TYPE := 'New';
+    v_interested public.job_candidates.candidate_status%TYPE := 'Interested';
+BEGIN
+    FOR v_run IN 1..p_runs LOOP
+        run := v_run;
+        FOREACH mode IN ARRAY ARRAY['row', 'statement'] LOOP
+            BEGIN
+                DROP TRIGGER IF EXISTS trg_candidate_status_change ON public.job_candidates;
+                DROP TRIGGER IF EXISTS trg_candidate_status_insert ON public.job_candidates;
+                DROP TRIGGER IF EXISTS trg_candidate_status_update ON public.job_candidates;
+
+                IF mode = 'row' THEN
+                    CREATE TRIGGER trg_candidate_status_change
+                        AFTER INSERT OR UPDATE ON public.job_candidates
+                        FOR EACH ROW
+                        EXECUTE FUNCTION log_candidate_status_change();
+                ELSE
+                    CREATE TRIGGER trg_candidate_status_update
+                        AFTER UPDATE ON public.job_candidates
+                        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                        FOR EACH STATEMENT
+                        EXECUTE FUNCTION log_candidate_status_updates();
+                END IF;
+
+                v_start := clock_timestamp();
+                UPDATE public.job_candidates jc
+                SET candidate_status = CASE WHEN jc.candidate_status = v_new THEN v_interested ELSE v_new END
+                WHERE jc.id IN (
+                    SELECT x.id FROM public.job_candidates x
+                    WHERE x.job_id = p_job_id
+                    ORDER BY x.id
+                    LIMIT p_rows
+                );
+                GET DIAGNOSTICS v_rows = ROW_COUNT;
+                v_elapsed := clock_timestamp() - v_start;
+
+                -- Undo the update, the activity rows and the trigger swap
+                RAISE EXCEPTION USING ERRCODE = 'BM001', MESSAGE = 'benchmark rollback';
+            EXCEPTION WHEN SQLSTATE 'BM001' THEN
+                NULL;
+            END;
+
+            rows_updated := v_rows;
+            elapsed_ms := ROUND(EXTRACT(EPOCH FROM v_elapsed) * 1000, 2);
+            RETURN NEXT;
+        END LOOP;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,358 @@
+-- =============================================================================
+-- Migration: Per-Job Candidate Counts and Recent Activity Cache
+-- Created: 2026-10-18
+--
+-- Every candidate insert and status change appends to job_activities, and the
+-- per-job pages aggregated job_candidates / scanned job_activities on every
+-- load. This adds two incrementally maintained tables:
+--
+--   job_candidate_status_counts   (job_id, candidate_status) -> candidate_count
+--       kept current by statement-level triggers on job_candidates (INSERT,
+--       UPDATE, DELETE), one grouped upsert per statement from the transition
+--       tables, next to the activity triggers from 09.
+--   job_recent_activities         last 20 activities per job
+--       copied from job_activities inserts and trimmed per job. Activities
+--       are ranked by (created_at, id), newest first; rows are cached in
+--       that order, so the trim's tiebreak on the cache id agrees with it.
+--
+-- job_pipeline_counts (view) exposes the "Hired / In Pipeline / Dropped"
+-- counters and one column per Kanban stage from the counts table.
+--
+-- Retention: prune_job_activities(interval, types) moves raw activity rows
+-- older than the interval into job_activities_archive (or deletes them with
+-- p_archive => false). Rows still shown in job_recent_activities are kept.
+-- The counters do not depend on the raw log, so pruning never changes them.
+-- Schedule it with pg_cron, e.g.
+--   SELECT cron.schedule('prune-job-activities', '0 3 * * 0',
+--       $$SELECT prune_job_activities(INTERVAL '1 year')$$);
+--
+-- rebuild_job_rollups() recomputes both tables from scratch; it runs once at
+-- the end of this migration as the backfill.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS job_candidate_status_counts (
+    job_id UUID NOT NULL,
+    candidate_status TEXT NOT NULL,
+    candidate_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (job_id, candidate_status)
+);
+
+CREATE TABLE IF NOT EXISTS job_recent_activities (
+    id BIGSERIAL PRIMARY KEY,
+    job_id UUID NOT NULL,
+    activity_id TEXT NOT NULL,
+    activity_type TEXT,
+    content TEXT,
+    created_by TEXT,
+    created_at TIMESTAMPTZ,
+    metadata JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_recent_activities_job
+    ON job_recent_activities (job_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_job_recent_activities_activity
+    ON job_recent_activities (activity_id);
+
+-- Used by refresh_job_recent_activities() and prune_job_activities()
+CREATE INDEX IF NOT EXISTS idx_job_activities_job_created_at
+    ON public.job_activities (job_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_job_activities_created_at
+    ON public.job_activities (created_at);
+
+CREATE TABLE IF NOT EXISTS job_activities_archive
+    (LIKE public.job_activities INCLUDING DEFAULTS);
+
+
+-- =============================================================================
+-- Candidate counts
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION count_job_candidates_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO job_candidate_status_counts (job_id, candidate_status, candidate_count)
+    SELECT n.job_id, n.candidate_status::text, COUNT(*)
+    FROM new_rows n
+    GROUP BY n.job_id, n.candidate_status
+    ON CONFLICT (job_id, candidate_status) DO UPDATE
+    SET candidate_count = job_candidate_status_counts.candidate_count + EXCLUDED.candidate_count,
+        updated_at = now();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION count_job_candidates_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Old rows count -1 and new rows +1, so status and job_id changes both move
+    INSERT INTO job_candidate_status_counts (job_id, candidate_status, candidate_count)
+    SELECT d.job_id, d.candidate_status, SUM(d.delta)
+    FROM (
+        SELECT o.job_id, o.candidate_status::text AS candidate_status, -1 AS delta FROM old_rows o
+        UNION ALL
+        SELECT n.job_id, n.candidate_status::text, 1 FROM new_rows n
+    ) d
+    GROUP BY d.job_id, d.candidate_status
+    HAVING SUM(d.delta) <> 0
+    ON CONFLICT (job_id, candidate_status) DO UPDATE
+    SET candidate_count = job_candidate_status_counts.candidate_count + EXCLUDED.candidate_count,
+        updated_at = now();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION count_job_candidates_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE job_candidate_status_counts c
+    SET candidate_count = c.candidate_count - d.removed,
+        updated_at = now()
+    FROM (
+        SELECT o.job_id, o.candidate_status::text AS candidate_status, COUNT(*) AS removed
+        FROM old_rows o
+        GROUP BY o.job_id, o.candidate_status
+    ) d
+    WHERE c.job_id = d.job_id
+      AND c.candidate_status = d.candidate_status;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trg_job_candidate_counts_insert ON public.job_candidates;
+CREATE TRIGGER trg_job_candidate_counts_insert
+    AFTER INSERT ON public.job_candidates
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_job_candidates_inserted();
+
+DROP TRIGGER IF EXISTS trg_job_candidate_counts_update ON public.job_candidates;
+CREATE TRIGGER trg_job_candidate_counts_update
+    AFTER UPDATE ON public.job_candidates
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_job_candidates_updated();
+
+DROP TRIGGER IF EXISTS trg_job_candidate_counts_delete ON public.job_candidates;
+CREATE TRIGGER trg_job_candidate_counts_delete
+    AFTER DELETE ON public.job_candidates
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_job_candidates_deleted();
+
+
+CREATE OR REPLACE VIEW job_pipeline_counts AS
+SELECT
+    job_id,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Hired'), 0) AS hired,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status NOT IN ('Hired', 'Dropped')), 0) AS in_pipeline,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Dropped'), 0) AS dropped,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'New'), 0) AS new,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Interested'), 0) AS interested,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Shortlisted'), 0) AS shortlisted,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Client Submission'), 0) AS client_submission,
+    COALESCE(SUM(candidate_count) FILTER (WHERE candidate_status = 'Client Interview'), 0) AS client_interview,
+    COALESCE(SUM(candidate_count), 0) AS total_candidates
+FROM job_candidate_status_counts
+GROUP BY job_id;
+
+
+-- =============================================================================
+-- Recent activity cache
+-- =============================================================================
+
+-- trim_job_recent_activities: keep the newest 20 cached activities per job
+CREATE OR REPLACE FUNCTION trim_job_recent_activities(p_job_ids UUID[])
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    DELETE FROM job_recent_activities r
+    USING (
+        SELECT id,
+               ROW_NUMBER() OVER (PARTITION BY job_id ORDER BY created_at DESC, id DESC) AS rn
+        FROM job_recent_activities
+        WHERE job_id = ANY(p_job_ids)
+    ) ranked
+    WHERE r.id = ranked.id
+      AND ranked.rn > 20;
+$$;
+
+
+-- refresh_job_recent_activities: reload the cache of the given jobs from the raw log
+CREATE OR REPLACE FUNCTION refresh_job_recent_activities(p_job_ids UUID[])
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    DELETE FROM job_recent_activities WHERE job_id = ANY(p_job_ids);
+
+    INSERT INTO job_recent_activities (job_id, activity_id, activity_type, content, created_by, created_at, metadata)
+    SELECT a.job_id, a.id::text, a.activity_type::text, a.content, a.created_by::text, a.created_at, a.metadata
+    FROM unnest(p_job_ids) AS j(job_id)
+    CROSS JOIN LATERAL (
+        SELECT *
+        FROM public.job_activities ja
+        WHERE ja.job_id = j.job_id
+        ORDER BY ja.created_at DESC, ja.id DESC
+        LIMIT 20
+    ) a
+    ORDER BY a.created_at, a.id;
+$$;
+
+
+CREATE OR REPLACE FUNCTION cache_job_activities_inserted()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_job_ids UUID[];
+BEGIN
+    -- Only the newest 20 of each job can survive the trim
+    INSERT INTO job_recent_activities (job_id, activity_id, activity_type, content, created_by, created_at, metadata)
+    SELECT n.job_id, n.id::text, n.activity_type::text, n.content, n.created_by::text, n.created_at, n.metadata
+    FROM (
+        SELECT nr.*,
+               ROW_NUMBER() OVER (PARTITION BY nr.job_id ORDER BY nr.created_at DESC, nr.id DESC) AS rn
+        FROM new_rows nr
+        WHERE nr.job_id IS NOT NULL
+    ) n
+    WHERE n.rn <= 20
+    ORDER BY n.created_at, n.id;
+
+    SELECT array_agg(DISTINCT n.job_id) INTO v_job_ids
+    FROM new_rows n
+    WHERE n.job_id IS NOT NULL;
+
+    IF v_job_ids IS NOT NULL THEN
+        PERFORM trim_job_recent_activities(v_job_ids);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Edits and manual deletes are rare; reload the affected jobs from the log
+CREATE OR REPLACE FUNCTION cache_job_activities_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_job_ids UUID[];
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(DISTINCT job_id) INTO v_job_ids
+        FROM (
+            SELECT o.job_id FROM old_rows o
+            UNION
+            SELECT n.job_id FROM new_rows n
+        ) j
+        WHERE job_id IS NOT NULL;
+    ELSE
+        SELECT array_agg(DISTINCT o.job_id) INTO v_job_ids
+        FROM old_rows o
+        WHERE o.job_id IS NOT NULL
+          AND EXISTS (SELECT 1 FROM job_recent_activities r WHERE r.activity_id = o.id::text);
+    END IF;
+
+    IF v_job_ids IS NOT NULL THEN
+        PERFORM refresh_job_recent_activities(v_job_ids);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trg_job_activities_cache_insert ON public.job_activities;
+CREATE TRIGGER trg_job_activities_cache_insert
+    AFTER INSERT ON public.job_activities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cache_job_activities_inserted();
+
+DROP TRIGGER IF EXISTS trg_job_activities_cache_update ON public.job_activities;
+CREATE TRIGGER trg_job_activities_cache_update
+    AFTER UPDATE ON public.job_activities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cache_job_activities_changed();
+
+DROP TRIGGER IF EXISTS trg_job_activities_cache_delete ON public.job_activities;
+CREATE TRIGGER trg_job_activities_cache_delete
+    AFTER DELETE ON public.job_activities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cache_job_activities_changed();
+
+
+-- =============================================================================
+-- Retention
+-- =============================================================================
+
+-- prune_job_activities: archive (or delete) raw activity rows older than
+-- p_older_than. p_activity_types limits pruning to those types (NULL = all).
+-- Returns the number of rows removed from job_activities.
+CREATE OR REPLACE FUNCTION prune_job_activities(
+    p_older_than INTERVAL DEFAULT INTERVAL '1 year',
+    p_activity_types TEXT[] DEFAULT ARRAY['candidate_update'],
+    p_archive BOOLEAN DEFAULT true
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_removed BIGINT;
+BEGIN
+    IF p_archive THEN
+        WITH pruned AS (
+            DELETE FROM public.job_activities a
+            WHERE a.created_at < now() - p_older_than
+              AND (p_activity_types IS NULL OR a.activity_type::text = ANY(p_activity_types))
+              AND NOT EXISTS (
+                  SELECT 1 FROM job_recent_activities r WHERE r.activity_id = a.id::text
+              )
+            RETURNING a.*
+        )
+        INSERT INTO job_activities_archive SELECT * FROM pruned;
+    ELSE
+        DELETE FROM public.job_activities a
+        WHERE a.created_at < now() - p_older_than
+          AND (p_activity_types IS NULL OR a.activity_type::text = ANY(p_activity_types))
+          AND NOT EXISTS (
+              SELECT 1 FROM job_recent_activities r WHERE r.activity_id = a.id::text
+          );
+    END IF;
+
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+    RETURN v_removed;
+END;
+$$;
+
+
+-- =============================================================================
+-- Backfill
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION rebuild_job_rollups()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    TRUNCATE job_candidate_status_counts;
+    INSERT INTO job_candidate_status_counts (job_id, candidate_status, candidate_count)
+    SELECT job_id, candidate_status::text, COUNT(*)
+    FROM public.job_candidates
+    GROUP BY job_id, candidate_status;
+
+    TRUNCATE job_recent_activities;
+    PERFORM refresh_job_recent_activities(
+        ARRAY(SELECT DISTINCT job_id FROM public.job_activities WHERE job_id IS NOT NULL)
+    );
+END;
+$$;
+
+SELECT rebuild_job_rollups();
@@ -0,0 +1,287 @@
+-- =============================================================================
+-- Migration: Candidate Sync Outbox
+-- Created: 2026-10-18
+--
+-- Rows written straight into expandi_network (CSV importers) or into the
+-- textkernel_* tables (Colab insert) only reached candidates when someone
+-- called the sync functions or ran a full re-sync. Statement-level triggers
+-- on the source tables now record the changed ids in candidate_sync_outbox,
+-- one row per (source, source_id), so repeated writes to the same contact or
+-- resume coalesce into one pending sync.
+--
+--   source = 'expandi'     source_id = expandi_network.id
+--   source = 'textkernel'  source_id = textkernel_resumes.id (child tables
+--                          enqueue their resume_id)
+--
+-- drain_candidate_sync_outbox(source, limit) claims up to `limit` ids with
+-- FOR UPDATE SKIP LOCKED, removes them from the outbox and syncs them through
+-- sync_expandi_to_candidates_bulk / sync_textkernel_to_candidates_bulk in the
+-- same transaction, so a failed call leaves them queued. Several workers can
+-- drain concurrently.
+--
+-- Only ids that have been quiet for p_min_age_seconds (default 60) are
+-- claimed. The Colab loader writes textkernel_resumes and its child tables
+-- in separate requests, and every write pushes enqueued_at forward, so a
+-- resume is synced once its contact / email / position rows are in rather
+-- than being inserted as a new candidate before it can match.
+--
+-- If the bulk call raises, the batch is retried one id at a time; ids that
+-- still fail go back into the outbox with attempts + 1, last_error and
+-- retry_after = now() + 1 minute * 2^attempts, and are skipped once they reach
+-- p_max_attempts. A new write to the row clears attempts and retry_after.
+--
+-- upsert_expandi_candidate(s) sync the rows they write themselves, so they run
+-- with candidate_sync.inline = on and the expandi_network triggers skip the
+-- enqueue for those statements. A CREATE OR REPLACE of either function drops
+-- the setting; re-run the ALTER FUNCTION statements below after one.
+--
+-- The worker is scripts/sync_candidates_worker.py. Pending work:
+--   SELECT source, COUNT(*), MIN(enqueued_at) FROM candidate_sync_outbox GROUP BY source;
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS candidate_sync_outbox (
+    source TEXT NOT NULL CHECK (source IN ('expandi', 'textkernel')),
+    source_id TEXT NOT NULL,
+    enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    retry_after TIMESTAMPTZ,
+    PRIMARY KEY (source, source_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_sync_outbox_pending
+    ON candidate_sync_outbox (source, enqueued_at);
+
+
+-- =============================================================================
+-- Enqueue triggers
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION enqueue_expandi_candidate_sync()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Written by an upsert RPC that syncs the rows before it returns
+    IF current_setting('candidate_sync.inline', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO candidate_sync_outbox (source, source_id)
+    SELECT DISTINCT 'expandi', n.id::text
+    FROM new_rows n
+    WHERE n.id IS NOT NULL
+    ON CONFLICT (source, source_id) DO UPDATE
+    SET enqueued_at = now(),
+        attempts = 0,
+        last_error = NULL,
+        retry_after = NULL;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- textkernel_resumes itself: the resume id is the row id
+CREATE OR REPLACE FUNCTION enqueue_textkernel_resume_sync()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO candidate_sync_outbox (source, source_id)
+    SELECT DISTINCT 'textkernel', n.id::text
+    FROM new_rows n
+    WHERE n.id IS NOT NULL
+    ON CONFLICT (source, source_id) DO UPDATE
+    SET enqueued_at = now(),
+        attempts = 0,
+        last_error = NULL,
+        retry_after = NULL;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- textkernel child tables: enqueue the parent resume
+CREATE OR REPLACE FUNCTION enqueue_textkernel_child_sync()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO candidate_sync_outbox (source, source_id)
+    SELECT DISTINCT 'textkernel', n.resume_id::text
+    FROM new_rows n
+    WHERE n.resume_id IS NOT NULL
+    ON CONFLICT (source, source_id) DO UPDATE
+    SET enqueued_at = now(),
+        attempts = 0,
+        last_error = NULL,
+        retry_after = NULL;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trg_expandi_network_sync_insert ON expandi_network;
+CREATE TRIGGER trg_expandi_network_sync_insert
+    AFTER INSERT ON expandi_network
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION enqueue_expandi_candidate_sync();
+
+DROP TRIGGER IF EXISTS trg_expandi_network_sync_update ON expandi_network;
+CREATE TRIGGER trg_expandi_network_sync_update
+    AFTER UPDATE ON expandi_network
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION enqueue_expandi_candidate_sync();
+
+ALTER FUNCTION upsert_expandi_candidate(JSONB) SET candidate_sync.inline = 'on';
+ALTER FUNCTION upsert_expandi_candidates(JSONB) SET candidate_sync.inline = 'on';
+
+DROP TRIGGER IF EXISTS trg_textkernel_resumes_sync_insert ON textkernel_resumes;
+CREATE TRIGGER trg_textkernel_resumes_sync_insert
+    AFTER INSERT ON textkernel_resumes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION enqueue_textkernel_resume_sync();
+
+DROP TRIGGER IF EXISTS trg_textkernel_resumes_sync_update ON textkernel_resumes;
+CREATE TRIGGER trg_textkernel_resumes_sync_update
+    AFTER UPDATE ON textkernel_resumes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION enqueue_textkernel_resume_sync();
+
+-- The child tables the sync functions read from
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY[
+        'textkernel_contact', 'textkernel_emails', 'textkernel_phones',
+        'textkernel_positions', 'textkernel_skills'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_' || v_table || '_sync_insert', v_table);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION enqueue_textkernel_child_sync()',
+            'trg_' || v_table || '_sync_insert', v_table
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_' || v_table || '_sync_update', v_table);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION enqueue_textkernel_child_sync()',
+            'trg_' || v_table || '_sync_update', v_table
+        );
+    END LOOP;
+END;
+$$;
+
+
+-- =============================================================================
+-- Drain
+-- =============================================================================
+
+-- drain_candidate_sync_outbox: sync one batch of pending ids of one source.
+-- Returns outcome counts like the *_bulk functions; ids synced one at a time
+-- after a failed bulk call are reported as 'synced', failures as 'failed'.
+CREATE OR REPLACE FUNCTION drain_candidate_sync_outbox(
+    p_source TEXT,
+    p_limit INTEGER DEFAULT 500,
+    p_max_attempts INTEGER DEFAULT 5,
+    p_min_age_seconds INTEGER DEFAULT 60
+)
+RETURNS TABLE (action TEXT, row_count BIGINT)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_ids TEXT[];
+    v_attempts INTEGER[];
+    v_result JSONB;
+    v_error TEXT;
+    v_synced BIGINT := 0;
+    v_failed BIGINT := 0;
+BEGIN
+    IF p_source NOT IN ('expandi', 'textkernel') THEN
+        RAISE EXCEPTION 'Unknown candidate sync source: %', p_source;
+    END IF;
+
+    WITH claimed AS (
+        SELECT o.source_id
+        FROM candidate_sync_outbox o
+        WHERE o.source = p_source
+          AND o.attempts < p_max_attempts
+          AND o.enqueued_at < now() - make_interval(secs => p_min_age_seconds)
+          AND (o.retry_after IS NULL OR o.retry_after <= now())
+        ORDER BY o.enqueued_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ),
+    removed AS (
+        DELETE FROM candidate_sync_outbox o
+        USING claimed c
+        WHERE o.source = p_source
+          AND o.source_id = c.source_id
+        RETURNING o.source_id, o.attempts, o.enqueued_at
+    )
+    SELECT array_agg(source_id ORDER BY enqueued_at), array_agg(attempts ORDER BY enqueued_at)
+    INTO v_ids, v_attempts
+    FROM removed;
+
+    IF v_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    BEGIN
+        IF p_source = 'expandi' THEN
+            SELECT jsonb_agg(jsonb_build_object('action', b.action, 'row_count', b.row_count))
+            INTO v_result
+            FROM sync_expandi_to_candidates_bulk(v_ids::bigint[]) b;
+        ELSE
+            SELECT jsonb_agg(jsonb_build_object('action', b.action, 'row_count', b.row_count))
+            INTO v_result
+            FROM sync_textkernel_to_candidates_bulk(v_ids::uuid[]) b;
+        END IF;
+    EXCEPTION WHEN OTHERS THEN
+        v_result := NULL;
+    END;
+
+    IF v_result IS NOT NULL THEN
+        RETURN QUERY
+        SELECT r.action, r.row_count
+        FROM jsonb_to_recordset(v_result) AS r(action TEXT, row_count BIGINT);
+        RETURN;
+    END IF;
+
+    -- The bulk call failed: isolate the ids that cannot be synced
+    FOR i IN 1..array_length(v_ids, 1) LOOP
+        BEGIN
+            IF p_source = 'expandi' THEN
+                PERFORM sync_expandi_to_candidates(v_ids[i]::bigint);
+            ELSE
+                PERFORM sync_textkernel_to_candidates(v_ids[i]::uuid);
+            END IF;
+            v_synced := v_synced + 1;
+        EXCEPTION WHEN OTHERS THEN
+            GET STACKED DIAGNOSTICS v_error = MESSAGE_TEXT;
+            INSERT INTO candidate_sync_outbox (source, source_id, attempts, last_error, retry_after)
+            VALUES (
+                p_source, v_ids[i], v_attempts[i] + 1, v_error,
+                now() + INTERVAL '1 minute' * power(2, v_attempts[i])
+            )
+            ON CONFLICT (source, source_id) DO UPDATE
+            SET last_error = EXCLUDED.last_error;
+            v_failed := v_failed + 1;
+        END;
+    END LOOP;
+
+    IF v_synced > 0 THEN
+        action := 'synced';
+        row_count := v_synced;
+        RETURN NEXT;
+    END IF;
+    IF v_failed > 0 THEN
+        action := 'failed';
+        row_count := v_failed;
+        RETURN NEXT;
+    END IF;
+END;
+$$;
@@ -0,0 +1,598 @@
+-- =============================================================================
+-- Migration: Candidate <-> Resume Links
+-- Created: 2026-10-18
+--
+-- candidates.textkernel_id is unique, so a second resume of the same person
+-- was never linked: every sync re-ran the email / name cascade and the full
+-- merge UPDATE for it. candidate_resumes links any number of resumes to a
+-- candidate, one row per resume, and marks one of them as primary:
+--
+--   primary = latest date as in resume_latest_dates (08), then earliest linked
+--
+-- candidates.textkernel_id now always holds the primary resume, and the
+-- resume fields on candidates are re-merged from it when it changes. The
+-- latest date is stored on the link; whenever a sync sees that a linked
+-- resume's date moved (e.g. its positions arrived after it was linked), the
+-- candidate's primary resume is re-picked.
+--
+-- sync_textkernel_to_candidates and sync_textkernel_to_candidates_many are
+-- replaced so that check 1 is a primary key lookup on candidate_resumes:
+--   primary resume     -> merge fields as before (outcome 'linked')
+--   secondary resume   -> return the candidate, no merge (outcome 'linked')
+--   not linked         -> email / name cascade or insert as before, then link
+-- A match no longer overwrites a textkernel_id the candidate already has.
+--
+-- Existing links are backfilled from candidates.textkernel_id. Resumes that
+-- were matched before but never linked get linked on their next sync, e.g.
+--   SELECT * FROM sync_textkernel_to_candidates_since('-infinity');
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS candidate_resumes (
+    resume_id UUID PRIMARY KEY REFERENCES textkernel_resumes(id) ON DELETE CASCADE,
+    candidate_id UUID NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    is_primary BOOLEAN NOT NULL DEFAULT FALSE,
+    match_method TEXT,
+    latest_date DATE,
+    linked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    synced_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_candidate
+    ON candidate_resumes (candidate_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidate_resumes_primary
+    ON candidate_resumes (candidate_id)
+    WHERE is_primary;
+
+INSERT INTO candidate_resumes (candidate_id, resume_id, match_method, is_primary)
+SELECT c.id, c.textkernel_id, c.match_method, TRUE
+FROM candidates c
+JOIN textkernel_resumes r ON r.id = c.textkernel_id
+ON CONFLICT (resume_id) DO NOTHING;
+
+
+CREATE INDEX IF NOT EXISTS idx_textkernel_education_resume_id
+    ON textkernel_education (resume_id);
+
+CREATE INDEX IF NOT EXISTS idx_textkernel_positions_resume_id
+    ON textkernel_positions (resume_id);
+
+
+-- resume_latest_date_of: latest_date of resume_latest_dates (08) for the given
+-- resumes only. The view aggregates every resume before filtering, so it is
+-- not used here.
+CREATE OR REPLACE FUNCTION resume_latest_date_of(p_resume_ids UUID[])
+RETURNS TABLE (resume_id UUID, latest_date DATE)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT d.resume_id, MAX(d.value)::date
+    FROM (
+        SELECT e.resume_id, GREATEST(e.start_date, e.end_date, e.last_education_date) AS value
+        FROM textkernel_education e
+        WHERE e.resume_id = ANY(p_resume_ids)
+
+        UNION ALL
+
+        SELECT p.resume_id, GREATEST(p.start_date, p.end_date)
+        FROM textkernel_positions p
+        WHERE p.resume_id = ANY(p_resume_ids)
+    ) d
+    GROUP BY d.resume_id;
+$$;
+
+
+-- candidate_primary_resumes: every linked resume of the given candidates with
+-- its current latest date and whether it should be the primary one
+CREATE OR REPLACE FUNCTION candidate_primary_resumes(p_candidate_ids UUID[])
+RETURNS TABLE (resume_id UUID, latest_date DATE, is_primary BOOLEAN)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH links AS (
+        SELECT l.resume_id, l.candidate_id, l.linked_at
+        FROM candidate_resumes l
+        WHERE l.candidate_id = ANY(p_candidate_ids)
+    )
+    SELECT
+        links.resume_id,
+        d.latest_date,
+        ROW_NUMBER() OVER (
+            PARTITION BY links.candidate_id
+            ORDER BY d.latest_date DESC NULLS LAST, links.linked_at, links.resume_id
+        ) = 1
+    FROM links
+    LEFT JOIN resume_latest_date_of(ARRAY(SELECT resume_id FROM links)) d
+        ON d.resume_id = links.resume_id;
+$$;
+
+
+-- refresh_candidate_primary_resume: re-pick the primary resume of each
+-- candidate and point candidates.textkernel_id at it. A candidate whose
+-- primary changed is re-synced from the new primary, so skills_summary,
+-- cv_file_name etc. come from it rather than from the old one.
+CREATE OR REPLACE FUNCTION refresh_candidate_primary_resume(p_candidate_ids UUID[])
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_resume_id UUID;
+BEGIN
+    -- Clear old primaries first; the partial unique index is checked per row
+    UPDATE candidate_resumes l SET is_primary = FALSE, latest_date = p.latest_date
+    FROM candidate_primary_resumes(p_candidate_ids) p
+    WHERE l.resume_id = p.resume_id
+      AND NOT p.is_primary
+      AND (l.is_primary OR l.latest_date IS DISTINCT FROM p.latest_date);
+
+    UPDATE candidate_resumes l SET is_primary = TRUE, latest_date = p.latest_date
+    FROM candidate_primary_resumes(p_candidate_ids) p
+    WHERE l.resume_id = p.resume_id
+      AND p.is_primary
+      AND (NOT l.is_primary OR l.latest_date IS DISTINCT FROM p.latest_date);
+
+    -- Primaries switch rarely, so the new ones are merged one at a time. The
+    -- resume is now linked as primary with a current latest_date, so the sync
+    -- goes straight to its check 1 merge.
+    FOR v_resume_id IN
+        UPDATE candidates c SET textkernel_id = l.resume_id
+        FROM candidate_resumes l
+        WHERE l.candidate_id = c.id
+          AND l.is_primary
+          AND c.id = ANY(p_candidate_ids)
+          AND c.textkernel_id IS DISTINCT FROM l.resume_id
+        RETURNING l.resume_id
+    LOOP
+        PERFORM sync_textkernel_to_candidates(v_resume_id);
+    END LOOP;
+END;
+$$;
+
+-- sync_textkernel_to_candidates: as in 03, with candidate_resumes as check 1.
+-- For a linked resume whose latest date moved, the candidate's primary resume
+-- is re-picked first; a linked secondary resume then returns its candidate
+-- without merging.
+CREATE OR REPLACE FUNCTION sync_textkernel_to_candidates(p_textkernel_id UUID)
+RETURNS UUID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_resume RECORD;
+    v_contact RECORD;
+    v_email TEXT;
+    v_phone TEXT;
+    v_current_title TEXT;
+    v_current_company TEXT;
+    v_location TEXT;
+    v_skills TEXT;
+    v_candidate_id UUID;
+    v_match_method TEXT;
+    v_is_primary BOOLEAN;
+    v_latest_date DATE;
+BEGIN
+    SELECT l.candidate_id, l.is_primary, l.latest_date
+    INTO v_candidate_id, v_is_primary, v_latest_date
+    FROM candidate_resumes l
+    WHERE l.resume_id = p_textkernel_id;
+    IF FOUND THEN
+        IF (SELECT d.latest_date FROM resume_latest_date_of(ARRAY[p_textkernel_id]) d)
+           IS DISTINCT FROM v_latest_date
+        THEN
+            PERFORM refresh_candidate_primary_resume(ARRAY[v_candidate_id]);
+            SELECT l.is_primary INTO v_is_primary
+            FROM candidate_resumes l
+            WHERE l.resume_id = p_textkernel_id;
+        END IF;
+
+        IF NOT v_is_primary THEN
+            UPDATE candidate_resumes SET synced_at = NOW() WHERE resume_id = p_textkernel_id;
+            RETURN v_candidate_id;
+        END IF;
+    END IF;
+
+    SELECT * INTO v_resume FROM textkernel_resumes WHERE id = p_textkernel_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'textkernel_resumes row % not found', p_textkernel_id;
+    END IF;
+
+    SELECT * INTO v_contact FROM textkernel_contact WHERE resume_id = p_textkernel_id;
+
+    SELECT e.email INTO v_email
+    FROM textkernel_emails e
+    WHERE e.resume_id = p_textkernel_id
+    ORDER BY e.id LIMIT 1;
+
+    SELECT normalized INTO v_phone
+    FROM textkernel_phones
+    WHERE resume_id = p_textkernel_id
+    ORDER BY id LIMIT 1;
+
+    SELECT job_title_raw, employer_name_raw
+    INTO v_current_title, v_current_company
+    FROM textkernel_positions
+    WHERE resume_id = p_textkernel_id
+    ORDER BY is_current DESC NULLS LAST, end_date DESC NULLS FIRST, start_date DESC NULLS LAST
+    LIMIT 1;
+
+    IF v_contact IS NOT NULL THEN
+        v_location := CONCAT_WS(', ',
+            NULLIF(v_contact.municipality, ''),
+            NULLIF(ARRAY_TO_STRING(v_contact.regions, ', '), ''),
+            NULLIF(v_contact.country_code, '')
+        );
+        IF v_location = '' THEN v_location := NULL; END IF;
+    END IF;
+
+    SELECT STRING_AGG(normalized_name, ', ' ORDER BY normalized_name)
+    INTO v_skills
+    FROM (
+        SELECT normalized_name
+        FROM textkernel_skills
+        WHERE resume_id = p_textkernel_id AND normalized_name IS NOT NULL
+        LIMIT 20
+    ) sub;
+
+    -- Check 1: Already linked as the candidate's primary resume
+    IF v_candidate_id IS NOT NULL THEN
+        UPDATE candidates SET
+            first_name              = COALESCE(candidates.first_name, v_contact.given_name),
+            last_name               = COALESCE(candidates.last_name, v_contact.family_name),
+            email                   = COALESCE(candidates.email, v_email),
+            phone                   = COALESCE(candidates.phone, v_phone),
+            current_title           = COALESCE(v_current_title, candidates.current_title),
+            current_company         = COALESCE(v_current_company, candidates.current_company),
+            location                = COALESCE(candidates.location, v_location),
+            professional_summary    = COALESCE(v_resume.professional_summary, candidates.professional_summary),
+            highest_degree          = COALESCE(v_resume.highest_degree_normalized, candidates.highest_degree),
+            current_management_level = COALESCE(v_resume.current_management_level, candidates.current_management_level),
+            management_score        = COALESCE(v_resume.management_score, candidates.management_score),
+            months_work_experience  = COALESCE(v_resume.months_work_experience, candidates.months_work_experience),
+            experience_description  = COALESCE(v_resume.experience_description, candidates.experience_description),
+            skills_summary          = COALESCE(v_skills, candidates.skills_summary),
+            cv_file_name            = COALESCE(v_resume.file_name, candidates.cv_file_name),
+            updated_at              = NOW()
+        WHERE id = v_candidate_id;
+        UPDATE candidate_resumes SET synced_at = NOW() WHERE resume_id = p_textkernel_id;
+        RETURN v_candidate_id;
+    END IF;
+
+    -- Check 2: Email match
+    IF v_email IS NOT NULL THEN
+        SELECT id INTO v_candidate_id
+        FROM candidates
+        WHERE LOWER(email) = LOWER(v_email);
+        IF FOUND THEN
+            v_match_method := 'email';
+        END IF;
+    END IF;
+
+    -- Check 3: Name match (first + last, both non-null)
+    IF v_candidate_id IS NULL
+       AND v_contact IS NOT NULL
+       AND v_contact.given_name IS NOT NULL
+       AND v_contact.family_name IS NOT NULL
+    THEN
+        SELECT id INTO v_candidate_id
+        FROM candidates
+        WHERE LOWER(first_name) = LOWER(v_contact.given_name)
+          AND LOWER(last_name) = LOWER(v_contact.family_name)
+        LIMIT 1;
+        IF FOUND THEN
+            v_match_method := 'name';
+        END IF;
+    END IF;
+
+    -- Match found: merge
+    IF v_candidate_id IS NOT NULL THEN
+        UPDATE candidates SET
+            first_name              = COALESCE(candidates.first_name, v_contact.given_name),
+            last_name               = COALESCE(candidates.last_name, v_contact.family_name),
+            email                   = COALESCE(candidates.email, v_email),
+            phone                   = COALESCE(candidates.phone, v_phone),
+            current_title           = COALESCE(v_current_title, candidates.current_title),
+            current_company         = COALESCE(v_current_company, candidates.current_company),
+            location                = COALESCE(candidates.location, v_location),
+            professional_summary    = COALESCE(v_resume.professional_summary, candidates.professional_summary),
+            highest_degree          = COALESCE(v_resume.highest_degree_normalized, candidates.highest_degree),
+            current_management_level = COALESCE(v_resume.current_management_level, candidates.current_management_level),
+            management_score        = COALESCE(v_resume.management_score, candidates.management_score),
+            months_work_experience  = COALESCE(v_resume.months_work_experience, candidates.months_work_experience),
+            experience_description  = COALESCE(v_resume.experience_description, candidates.experience_description),
+            skills_summary          = COALESCE(v_skills, candidates.skills_summary),
+            cv_file_name            = COALESCE(v_resume.file_name, candidates.cv_file_name),
+            source                  = 'both',
+            textkernel_id           = COALESCE(candidates.textkernel_id, p_textkernel_id),
+            match_method            = v_match_method,
+            updated_at              = NOW()
+        WHERE id = v_candidate_id;
+
+        INSERT INTO candidate_resumes (candidate_id, resume_id, match_method)
+        VALUES (v_candidate_id, p_textkernel_id, v_match_method)
+        ON CONFLICT (resume_id) DO NOTHING;
+        PERFORM refresh_candidate_primary_resume(ARRAY[v_candidate_id]);
+        RETURN v_candidate_id;
+    END IF;
+
+    -- No match: insert new candidate
+    INSERT INTO candidates (
+        first_name, last_name, email, phone,
+        current_title, current_company, location,
+        professional_summary, highest_degree,
+        current_management_level, management_score,
+        months_work_experience, experience_description,
+        skills_summary, cv_file_name,
+        source, textkernel_id, match_method,
+        created_at, updated_at
+    ) VALUES (
+        v_contact.given_name, v_contact.family_name, v_email, v_phone,
+        v_current_title, v_current_company, v_location,
+        v_resume.professional_summary, v_resume.highest_degree_normalized,
+        v_resume.current_management_level, v_resume.management_score,
+        v_resume.months_work_experience, v_resume.experience_description,
+        v_skills, v_resume.file_name,
+        'textkernel', p_textkernel_id, NULL,
+        NOW(), NOW()
+    )
+    RETURNING id INTO v_candidate_id;
+
+    INSERT INTO candidate_resumes (candidate_id, resume_id, is_primary, latest_date)
+    SELECT v_candidate_id, p_textkernel_id, TRUE,
+           (SELECT d.latest_date FROM resume_latest_date_of(ARRAY[p_textkernel_id]) d);
+
+    RETURN v_candidate_id;
+END;
+$$;
+
+
+-- sync_textkernel_to_candidates_many: as in 05, with candidate_resumes as check 1
+CREATE OR REPLACE FUNCTION sync_textkernel_to_candidates_many(p_textkernel_ids UUID[])
+RETURNS TABLE (textkernel_id UUID, candidate_id UUID, action TEXT)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_id UUID;
+    v_linked BOOLEAN;
+BEGIN
+    DROP TABLE IF EXISTS _textkernel_sync;
+    CREATE TEMP TABLE _textkernel_sync ON COMMIT DROP AS
+    WITH ids AS (
+        SELECT DISTINCT ON (id) id, ord
+        FROM unnest(p_textkernel_ids) WITH ORDINALITY AS u(id, ord)
+        ORDER BY id, ord
+    ),
+    contact AS (
+        SELECT DISTINCT ON (ct.resume_id)
+            ct.resume_id,
+            ct.given_name,
+            ct.family_name,
+            -- Same row-null test as "v_contact IS NOT NULL" in the per-row function
+            ct IS NOT NULL AS contact_complete,
+            NULLIF(CONCAT_WS(', ',
+                NULLIF(ct.municipality, ''),
+                NULLIF(ARRAY_TO_STRING(ct.regions, ', '), ''),
+                NULLIF(ct.country_code, '')
+            ), '') AS location
+        FROM textkernel_contact ct
+        WHERE ct.resume_id IN (SELECT id FROM ids)
+    ),
+    email AS (
+        SELECT DISTINCT ON (resume_id) resume_id, email
+        FROM textkernel_emails
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, id
+    ),
+    phone AS (
+        SELECT DISTINCT ON (resume_id) resume_id, normalized AS phone
+        FROM textkernel_phones
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, id
+    ),
+    current_position AS (
+        SELECT DISTINCT ON (resume_id)
+            resume_id,
+            job_title_raw AS current_title,
+            employer_name_raw AS current_company
+        FROM textkernel_positions
+        WHERE resume_id IN (SELECT id FROM ids)
+        ORDER BY resume_id, is_current DESC NULLS LAST, end_date DESC NULLS FIRST, start_date DESC NULLS LAST
+    ),
+    skills AS (
+        SELECT resume_id, STRING_AGG(normalized_name, ', ' ORDER BY normalized_name) AS skills
+        FROM (
+            SELECT resume_id, normalized_name,
+                   ROW_NUMBER() OVER (PARTITION BY resume_id ORDER BY id) AS rn
+            FROM textkernel_skills
+            WHERE resume_id IN (SELECT id FROM ids) AND normalized_name IS NOT NULL
+        ) ranked
+        WHERE rn <= 20
+        GROUP BY resume_id
+    )
+    SELECT
+        ids.id,
+        ids.ord,
+        r.id IS NULL AS missing,
+        COALESCE(c.contact_complete, FALSE) AS contact_complete,
+        c.given_name, c.family_name,
+        e.email, p.phone,
+        pos.current_title, pos.current_company,
+        CASE WHEN c.contact_complete THEN c.location END AS location,
+        r.professional_summary, r.highest_degree_normalized,
+        r.current_management_level, r.management_score,
+        r.months_work_experience, r.experience_description,
+        s.skills, r.file_name,
+        NULL::UUID AS candidate_id,
+        NULL::TEXT AS action,
+        FALSE AS contended,
+        FALSE AS secondary
+    FROM ids
+    LEFT JOIN textkernel_resumes r ON r.id = ids.id
+    LEFT JOIN contact c ON c.resume_id = ids.id
+    LEFT JOIN email e ON e.resume_id = ids.id
+    LEFT JOIN phone p ON p.resume_id = ids.id
+    LEFT JOIN current_position pos ON pos.resume_id = ids.id
+    LEFT JOIN skills s ON s.resume_id = ids.id;
+
+    UPDATE _textkernel_sync SET action = 'not_found' WHERE missing;
+
+    -- Check 1: Already linked; secondary resumes are not merged again
+    UPDATE _textkernel_sync s SET candidate_id = l.candidate_id, action = 'linked'
+    FROM candidate_resumes l
+    WHERE l.resume_id = s.id AND NOT s.missing;
+
+    -- Re-pick the primary resume where a linked resume's latest date moved
+    PERFORM refresh_candidate_primary_resume(ARRAY(
+        SELECT DISTINCT l.candidate_id
+        FROM _textkernel_sync s
+        JOIN candidate_resumes l ON l.resume_id = s.id
+        LEFT JOIN resume_latest_date_of(ARRAY(
+            SELECT id FROM _textkernel_sync WHERE action = 'linked'
+        )) d ON d.resume_id = s.id
+        WHERE s.action = 'linked'
+          AND d.latest_date IS DISTINCT FROM l.latest_date
+    ));
+
+    UPDATE _textkernel_sync s SET secondary = NOT l.is_primary
+    FROM candidate_resumes l
+    WHERE l.resume_id = s.id AND s.action = 'linked';
+
+    -- Check 2: Email match
+    UPDATE _textkernel_sync s SET candidate_id = c.id, action = 'email'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.email IS NOT NULL
+      AND LOWER(c.email) = LOWER(s.email);
+
+    -- Check 3: Name match (first + last, both non-null)
+    UPDATE _textkernel_sync s SET candidate_id = c.id, action = 'name'
+    FROM candidates c
+    WHERE s.action IS NULL
+      AND s.contact_complete
+      AND s.given_name IS NOT NULL
+      AND s.family_name IS NOT NULL
+      AND LOWER(c.first_name) = LOWER(s.given_name)
+      AND LOWER(c.last_name) = LOWER(s.family_name);
+
+    -- Rows sharing an email, name or target candidate with another row in the
+    -- batch depend on processing order.
+    UPDATE _textkernel_sync s SET contended = TRUE
+    FROM (
+        SELECT id,
+            CASE WHEN email IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY LOWER(email)) END AS n_email,
+            CASE WHEN given_name IS NULL OR family_name IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY LOWER(given_name), LOWER(family_name)) END AS n_name,
+            CASE WHEN candidate_id IS NULL THEN 1
+                 ELSE COUNT(*) OVER (PARTITION BY candidate_id) END AS n_candidate
+        FROM _textkernel_sync
+        WHERE NOT missing AND NOT secondary
+    ) k
+    WHERE k.id = s.id
+      AND (k.n_email > 1 OR k.n_name > 1 OR k.n_candidate > 1);
+
+    -- Match found: merge
+    UPDATE candidates SET
+        first_name              = COALESCE(candidates.first_name, s.given_name),
+        last_name               = COALESCE(candidates.last_name, s.family_name),
+        email                   = COALESCE(candidates.email, s.email),
+        phone                   = COALESCE(candidates.phone, s.phone),
+        current_title           = COALESCE(s.current_title, candidates.current_title),
+        current_company         = COALESCE(s.current_company, candidates.current_company),
+        location                = COALESCE(candidates.location, s.location),
+        professional_summary    = COALESCE(s.professional_summary, candidates.professional_summary),
+        highest_degree          = COALESCE(s.highest_degree_normalized, candidates.highest_degree),
+        current_management_level = COALESCE(s.current_management_level, candidates.current_management_level),
+        management_score        = COALESCE(s.management_score, candidates.management_score),
+        months_work_experience  = COALESCE(s.months_work_experience, candidates.months_work_experience),
+        experience_description  = COALESCE(s.experience_description, candidates.experience_description),
+        skills_summary          = COALESCE(s.skills, candidates.skills_summary),
+        cv_file_name            = COALESCE(s.file_name, candidates.cv_file_name),
+        source                  = CASE WHEN s.action = 'linked' THEN candidates.source ELSE 'both' END,
+        textkernel_id           = COALESCE(candidates.textkernel_id, s.id),
+        match_method            = CASE WHEN s.action = 'linked' THEN candidates.match_method ELSE s.action END,
+        updated_at              = NOW()
+    FROM _textkernel_sync s
+    WHERE candidates.id = s.candidate_id
+      AND NOT s.contended
+      AND NOT s.secondary;
+
+    -- No match: insert new candidates
+    WITH inserted AS (
+        INSERT INTO candidates (
+            first_name, last_name, email, phone,
+            current_title, current_company, location,
+            professional_summary, highest_degree,
+            current_management_level, management_score,
+            months_work_experience, experience_description,
+            skills_summary, cv_file_name,
+            source, textkernel_id, match_method,
+            created_at, updated_at
+        )
+        SELECT
+            s.given_name, s.family_name, s.email, s.phone,
+            s.current_title, s.current_company, s.location,
+            s.professional_summary, s.highest_degree_normalized,
+            s.current_management_level, s.management_score,
+            s.months_work_experience, s.experience_description,
+            s.skills, s.file_name,
+            'textkernel', s.id, NULL,
+            NOW(), NOW()
+        FROM _textkernel_sync s
+        WHERE s.action IS NULL
+          AND NOT s.contended
+        ORDER BY s.ord
+        RETURNING id, textkernel_id
+    )
+    UPDATE _textkernel_sync s SET candidate_id = i.id, action = 'inserted'
+    FROM inserted i
+    WHERE s.id = i.textkernel_id;
+
+    -- Link the newly matched / inserted resumes
+    INSERT INTO candidate_resumes (candidate_id, resume_id, match_method)
+    SELECT s.candidate_id, s.id, CASE WHEN s.action = 'inserted' THEN NULL ELSE s.action END
+    FROM _textkernel_sync s
+    WHERE s.action IN ('email', 'name', 'inserted')
+      AND NOT s.contended
+    ON CONFLICT (resume_id) DO NOTHING;
+
+    UPDATE candidate_resumes SET synced_at = NOW()
+    FROM _textkernel_sync s
+    WHERE candidate_resumes.resume_id = s.id
+      AND s.action = 'linked'
+      AND NOT s.contended;
+
+    PERFORM refresh_candidate_primary_resume(ARRAY(
+        SELECT DISTINCT s.candidate_id
+        FROM _textkernel_sync s
+        WHERE s.action IN ('email', 'name', 'inserted')
+          AND NOT s.contended
+    ));
+
+    -- Contended rows: one at a time, in array order
+    FOR v_id IN SELECT id FROM _textkernel_sync WHERE contended ORDER BY ord LOOP
+        v_linked := EXISTS (SELECT 1 FROM candidate_resumes l WHERE l.resume_id = v_id);
+        UPDATE _textkernel_sync s SET candidate_id = sync_textkernel_to_candidates(v_id)
+        WHERE s.id = v_id;
+        UPDATE _textkernel_sync s SET action = CASE
+                WHEN v_linked THEN 'linked'
+                ELSE COALESCE(c.match_method, 'inserted')
+            END
+        FROM candidates c
+        WHERE s.id = v_id AND c.id = s.candidate_id;
+    END LOOP;
+
+    -- One row per input element; later copies of an id report 'linked', as a
+    -- second per-row call would
+    RETURN QUERY
+    SELECT u.id, s.candidate_id,
+           CASE WHEN u.ord = s.ord OR s.missing THEN s.action ELSE 'linked' END
+    FROM unnest(p_textkernel_ids) WITH ORDINALITY AS u(id, ord)
+    JOIN _textkernel_sync s ON s.id IS NOT DISTINCT FROM u.id
+    ORDER BY u.ord;
+END;
+$$;
+
+
+-- Backfill: pick the primaries of the linked candidates. Runs after the
+-- replaced sync functions exist, since a switched primary is re-synced.
+SELECT refresh_candidate_primary_resume(ARRAY(SELECT DISTINCT candidate_id FROM candidate_resumes));
@@ -0,0 +1,153 @@
+-- =============================================================================
+-- Migration: Candidate Full-Text Search
+-- Created: 2026-10-18
+--
+-- Weighted search vector on candidates, GIN index and a ranked search RPC.
+-- The textkernel content reaches candidates through the sync functions
+-- (skills_summary = top-20 skills, professional_summary), so one vector on
+-- candidates covers both sources.
+--
+--   A  first_name, last_name
+--   B  current_title
+--   C  skills_summary
+--   D  professional_summary
+--
+-- Every field is indexed with both the german and the english configuration,
+-- so "Entwickler" matches "Entwicklung" and "developers" matches "developer".
+--
+-- search_vector is maintained by BEFORE triggers. On UPDATE the trigger only
+-- fires when one of the five fields actually changed, so the sync functions'
+-- merge UPDATEs (which SET every column) do not re-tokenize unchanged rows.
+--
+-- Usage:
+--   SELECT * FROM search_candidates('python developer', 20);
+--   SELECT * FROM search_candidates('"data engineer" OR "data scientist" NOT intern');
+-- Query syntax is websearch_to_tsquery: words are ANDed, OR, -word and
+-- "quoted phrases"; AND and NOT (upper case) are accepted as well outside
+-- quotes, so "research AND development" stays a phrase.
+-- =============================================================================
+
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+
+-- candidate_search_vector: weighted german + english vector for one candidate
+CREATE OR REPLACE FUNCTION candidate_search_vector(
+    p_first_name TEXT,
+    p_last_name TEXT,
+    p_current_title TEXT,
+    p_skills_summary TEXT,
+    p_professional_summary TEXT
+)
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT
+        setweight(to_tsvector('german'::regconfig, CONCAT_WS(' ', p_first_name, p_last_name)), 'A') ||
+        setweight(to_tsvector('english'::regconfig, CONCAT_WS(' ', p_first_name, p_last_name)), 'A') ||
+        setweight(to_tsvector('german'::regconfig, COALESCE(p_current_title, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, COALESCE(p_current_title, '')), 'B') ||
+        setweight(to_tsvector('german'::regconfig, COALESCE(p_skills_summary, '')), 'C') ||
+        setweight(to_tsvector('english'::regconfig, COALESCE(p_skills_summary, '')), 'C') ||
+        setweight(to_tsvector('german'::regconfig, COALESCE(p_professional_summary, '')), 'D') ||
+        setweight(to_tsvector('english'::regconfig, COALESCE(p_professional_summary, '')), 'D');
+$$;
+
+
+CREATE OR REPLACE FUNCTION update_candidate_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := candidate_search_vector(
+        NEW.first_name,
+        NEW.last_name,
+        NEW.current_title,
+        NEW.skills_summary,
+        NEW.professional_summary
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trg_candidates_search_vector_insert ON candidates;
+CREATE TRIGGER trg_candidates_search_vector_insert
+    BEFORE INSERT ON candidates
+    FOR EACH ROW
+    EXECUTE FUNCTION update_candidate_search_vector();
+
+DROP TRIGGER IF EXISTS trg_candidates_search_vector_update ON candidates;
+CREATE TRIGGER trg_candidates_search_vector_update
+    BEFORE UPDATE OF first_name, last_name, current_title, skills_summary, professional_summary
+    ON candidates
+    FOR EACH ROW
+    WHEN (
+        OLD.first_name IS DISTINCT FROM NEW.first_name
+        OR OLD.last_name IS DISTINCT FROM NEW.last_name
+        OR OLD.current_title IS DISTINCT FROM NEW.current_title
+        OR OLD.skills_summary IS DISTINCT FROM NEW.skills_summary
+        OR OLD.professional_summary IS DISTINCT FROM NEW.professional_summary
+    )
+    EXECUTE FUNCTION update_candidate_search_vector();
+
+
+-- Backfill
+UPDATE candidates SET search_vector = candidate_search_vector(
+    first_name,
+    last_name,
+    current_title,
+    skills_summary,
+    professional_summary
+)
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_candidates_search_vector
+    ON candidates USING GIN (search_vector);
+
+
+-- search_candidates: candidates matching p_query in either language, best
+-- ts_rank_cd first
+CREATE OR REPLACE FUNCTION search_candidates(p_query TEXT, p_limit INTEGER DEFAULT 50)
+RETURNS TABLE (
+    candidate_id UUID,
+    first_name TEXT,
+    last_name TEXT,
+    current_title TEXT,
+    current_company TEXT,
+    rank REAL
+)
+LANGUAGE sql
+STABLE
+AS $$
+    -- AND / NOT are rewritten outside double quotes only: splitting on '"'
+    -- puts the quoted phrases at the even positions
+    WITH parts AS (
+        SELECT t.part, t.n
+        FROM regexp_split_to_table(p_query, '"') WITH ORDINALITY AS t(part, n)
+    ),
+    q AS (
+        SELECT string_agg(
+            CASE WHEN parts.n % 2 = 1
+                 THEN regexp_replace(regexp_replace(parts.part, '\mAND\M', ' ', 'g'), '\mNOT\s+', '-', 'g')
+                 ELSE parts.part
+            END,
+            '"' ORDER BY parts.n
+        ) AS text
+        FROM parts
+    ),
+    query AS (
+        SELECT websearch_to_tsquery('german'::regconfig, q.text)
+            || websearch_to_tsquery('english'::regconfig, q.text) AS tsq
+        FROM q
+    )
+    SELECT
+        c.id,
+        c.first_name::text,
+        c.last_name::text,
+        c.current_title::text,
+        c.current_company::text,
+        ts_rank_cd(c.search_vector, query.tsq) AS rank
+    FROM candidates c, query
+    WHERE c.search_vector @@ query.tsq
+    ORDER BY rank DESC, c.id
+    LIMIT p_limit;
+$$;
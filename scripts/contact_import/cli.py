@@ -0,0 +1,119 @@
+"""
+Import Expandi / Juicebox CSV exports into expandi_network.
+
+Usage:
+    python -m contact_import <csv_dir> --source <label> --dedup-profile <profile>
+
+Dedup keys are read from a persistent index file (scripts/dedup_index.bin by
+default) that is refreshed incrementally before each run. Pass --rebuild-index
+to rebuild it from a full table scan, or --no-index-file to load the keys into
+memory from expandi_network without touching the file.
+
+--workers N parses and normalizes files in N processes; dedup and writes
+still run in one process in sorted file order, so the first file wins on
+cross-file duplicates as in a serial run. --progress-file checkpoints the
+rows done per file (import_progress.json format) and resumes from it.
+
+Transient Supabase errors are retried (see supabase_io.client). Rows that
+still fail are appended to scripts/dead_letter.jsonl (--dead-letter-file).
+"""
+
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from contact_import.dedup import DEDUP_PROFILES, DedupIndex, load_dedup_index
+from contact_import.index_store import DedupIndexFile
+from contact_import.pipeline import DEFAULT_BATCH_SIZE, import_csv_file, import_csv_files_parallel
+from contact_import.progress import ImportProgress
+from supabase_io.client import DeadLetterFile, get_client
+
+DEFAULT_INDEX_FILE = Path(__file__).resolve().parent.parent / "dedup_index.bin"
+DEFAULT_DEAD_LETTER_FILE = Path(__file__).resolve().parent.parent / "dead_letter.jsonl"
+
+
+def run_import(
+    csv_dir: Path,
+    source: Optional[str],
+    dedup_profile: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    client=None,
+    index_file: Optional[Path] = DEFAULT_INDEX_FILE,
+    rebuild_index: bool = False,
+    dead_letter_file: Path = DEFAULT_DEAD_LETTER_FILE,
+    workers: int = 1,
+    progress_file: Optional[Path] = None,
+) -> Counter:
+    csv_files = sorted(csv_dir.glob("*.csv"))
+
+    if not csv_files:
+        print(f"No CSV files found in {csv_dir}")
+        return Counter()
+
+    print(f"Found {len(csv_files)} CSV files to process")
+    print(f"Source directory: {csv_dir}\n")
+
+    client = client or get_client()
+    dead_letter = DeadLetterFile(dead_letter_file)
+    if index_file is None:
+        index = load_dedup_index(client, dedup_profile)
+    else:
+        store = DedupIndexFile(index_file)
+        if rebuild_index:
+            store.rebuild(client)
+        else:
+            store.refresh(client)
+        index = DedupIndex(dedup_profile, store=store)
+    print()
+
+    progress = ImportProgress(progress_file) if progress_file else None
+    stats = Counter()
+    if workers > 1:
+        import_csv_files_parallel(client, csv_files, index, source, stats, workers, batch_size, dead_letter, progress)
+    else:
+        for csv_path in csv_files:
+            import_csv_file(client, csv_path, index, source, stats, batch_size, dead_letter, progress)
+
+    print("\n" + "=" * 50)
+    print("IMPORT COMPLETE")
+    print("=" * 50)
+    print(f"Files processed: {stats['files_processed']}")
+    print(f"Total contacts inserted: {stats['inserted']}")
+    for check in index.checks:
+        print(f"Skipped ({check} match): {stats[f'{check}_match']}")
+    print(f"Records without profile_link: {stats['no_profile_link']}")
+    if stats["errors"]:
+        print(f"Failed inserts: {stats['errors']} (written to {dead_letter.path})")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import CSV exports into expandi_network.")
+    parser.add_argument("csv_dir", type=Path, help="Directory containing the CSV files")
+    parser.add_argument("--source", required=True, help="Value for expandi_network.source")
+    parser.add_argument("--dedup-profile", choices=sorted(DEDUP_PROFILES), default="full")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--index-file", type=Path, default=DEFAULT_INDEX_FILE)
+    parser.add_argument("--no-index-file", action="store_true", help="Load dedup keys from a full table scan")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the index file from scratch")
+    parser.add_argument("--dead-letter-file", type=Path, default=DEFAULT_DEAD_LETTER_FILE)
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to parse CSV files")
+    parser.add_argument("--progress-file", type=Path, help="Per-file checkpoint file, e.g. import_progress.json")
+    args = parser.parse_args(argv)
+
+    run_import(
+        args.csv_dir,
+        args.source,
+        args.dedup_profile,
+        args.batch_size,
+        index_file=None if args.no_index_file else args.index_file,
+        rebuild_index=args.rebuild_index,
+        dead_letter_file=args.dead_letter_file,
+        workers=args.workers,
+        progress_file=args.progress_file,
+    )
+
+
+if __name__ == "__main__":
+    main()
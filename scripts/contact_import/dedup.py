@@ -0,0 +1,256 @@
+"""
+Client-side deduplication against expandi_network.
+
+A dedup profile is an ordered list of checks (see data/docs/deduplication_method.md).
+A record is skipped on the first check that matches, with the same outcome
+the insert_contact_deduped SQL function returns, e.g.
+{"status": "skipped", "reason": "email_match", "existing_id": 456}.
+
+Keys are held as 64-bit hashes in sorted arrays (16 bytes per key including
+the owning id) rather than sets of strings, so 100k+ contacts across all four
+checks fit in a few MB.
+"""
+
+import hashlib
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from supabase_io.scan import iter_keyset_pages
+
+TABLE = "expandi_network"
+
+
+def _profile_link_key(record: dict) -> Optional[str]:
+    return record.get("profile_link") or None
+
+
+def _object_urn_key(record: dict) -> Optional[int]:
+    return record.get("object_urn")
+
+
+def _email_key(record: dict) -> Optional[str]:
+    email = (record.get("email") or "").strip()
+    return email.lower() if email else None
+
+
+def _name_title_key(record: dict) -> Optional[tuple]:
+    key = (record.get("first_name"), record.get("last_name"), record.get("job_title"))
+    return key if all(key) else None
+
+
+# check name -> key function, in cascade order
+CHECKS: Dict[str, Callable] = {
+    "profile_link": _profile_link_key,
+    "object_urn": _object_urn_key,
+    "email": _email_key,
+    "name_jobtitle": _name_title_key,
+}
+
+# Every column the checks need, fetched together in a single table scan.
+INDEX_COLUMNS = "id, profile_link, object_urn, email, first_name, last_name, job_title, created_at, updated_at"
+
+DEDUP_PROFILES: Dict[str, tuple] = {
+    "link": ("profile_link",),
+    "link_email": ("profile_link", "email"),
+    "full": ("profile_link", "object_urn", "email", "name_jobtitle"),
+}
+
+
+def key_hash(check: str, key) -> int:
+    """Stable 64-bit hash of a dedup key, namespaced by check."""
+    if isinstance(key, tuple):
+        key = "\x1f".join(key)
+    digest = hashlib.blake2b(f"{check}\x1e{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def sort_entries(hashes: array, ids: array) -> Tuple[array, array]:
+    """
+    Sort parallel hash/id arrays by hash, dropping repeated hashes. The sort is
+    stable, so the first id recorded for a key is the one kept.
+    """
+    order = sorted(range(len(hashes)), key=hashes.__getitem__)
+    sorted_hashes = array("Q")
+    sorted_ids = array("q")
+    for i in order:
+        if sorted_hashes and sorted_hashes[-1] == hashes[i]:
+            continue
+        sorted_hashes.append(hashes[i])
+        sorted_ids.append(ids[i])
+    return sorted_hashes, sorted_ids
+
+
+class KeyTable:
+    """Per-check sorted arrays of key hashes with the expandi_network id of each key."""
+
+    def __init__(self):
+        self._hashes: Dict[str, object] = {}
+        self._ids: Dict[str, object] = {}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, Tuple[array, array]]) -> "KeyTable":
+        table = cls()
+        for check, (hashes, ids) in arrays.items():
+            table._hashes[check], table._ids[check] = sort_entries(hashes, ids)
+        return table
+
+    def __len__(self) -> int:
+        return sum(len(hashes) for hashes in self._hashes.values())
+
+    def count(self, check: str) -> int:
+        return len(self._hashes.get(check, ()))
+
+    def entries(self, check: str) -> Tuple[array, array]:
+        """Copies of the hash and id arrays for a check."""
+        return array("Q", self._hashes.get(check, ())), array("q", self._ids.get(check, ()))
+
+    def lookup_hash(self, check: str, h: int) -> Optional[int]:
+        hashes = self._hashes.get(check)
+        if not hashes:
+            return None
+        i = bisect_left(hashes, h)
+        if i < len(hashes) and hashes[i] == h:
+            return self._ids[check][i]
+        return None
+
+    def lookup(self, check: str, key) -> Optional[int]:
+        """Return the expandi_network id stored for a key, or None."""
+        return self.lookup_hash(check, key_hash(check, key))
+
+    def contains(self, check: str, key) -> bool:
+        return self.lookup(check, key) is not None
+
+
+class DedupIndex:
+    """
+    Evaluates a dedup profile against a KeyTable of existing keys (held in
+    memory or a persistent DedupIndexFile) plus the keys of records added
+    during this run. Keys are kept for every check so one table scan serves
+    any profile; only the profile's checks are evaluated.
+
+    Records that passed dedup but are not written yet are held as pending
+    (reserve) so duplicates within the same batch are still caught. Once the
+    batch is written, inserted records are added and failed ones released.
+    """
+
+    def __init__(self, profile: str, store: Optional[KeyTable] = None):
+        if profile not in DEDUP_PROFILES:
+            raise ValueError(f"Unknown dedup profile: {profile}")
+        self.profile = profile
+        self.checks = DEDUP_PROFILES[profile]
+        self.store = store if store is not None else KeyTable()
+        self.added: Dict[str, Dict[int, Optional[int]]] = {check: {} for check in CHECKS}
+        self.pending: Dict[str, Dict[int, Optional[int]]] = {check: {} for check in CHECKS}
+
+    def match(self, record: dict) -> Optional[dict]:
+        """Return the skip outcome for the first matching check, or None."""
+        for check in self.checks:
+            key = CHECKS[check](record)
+            if key is None:
+                continue
+            h = key_hash(check, key)
+            if h in self.added[check]:
+                existing_id = self.added[check][h]
+            elif h in self.pending[check]:
+                existing_id = self.pending[check][h]
+            else:
+                existing_id = self.store.lookup_hash(check, h)
+                if existing_id is None:
+                    continue
+            return {"status": "skipped", "reason": f"{check}_match", "existing_id": existing_id}
+        return None
+
+    def _keys(self, record: dict) -> Iterator[Tuple[str, int]]:
+        for check, key_fn in CHECKS.items():
+            key = key_fn(record)
+            if key is not None:
+                yield check, key_hash(check, key)
+
+    def add(self, record: dict) -> None:
+        """Register the keys of a record that was written."""
+        for check, h in self._keys(record):
+            self.added[check].setdefault(h, record.get("id"))
+
+    def reserve(self, record: dict) -> None:
+        """Hold the keys of a record that is about to be written."""
+        for check, h in self._keys(record):
+            self.pending[check].setdefault(h, record.get("id"))
+
+    def release(self, record: dict) -> None:
+        """Drop a reserved record's keys, whether or not it was written."""
+        for check, h in self._keys(record):
+            self.pending[check].pop(h, None)
+
+
+def iter_network_pages(client, since: Optional[str] = None) -> Iterator:
+    """
+    Page through expandi_network once with a keyset scan on id, selecting
+    INDEX_COLUMNS. Imports may be writing to the table at the same time, and
+    a keyset scan neither skips nor repeats rows when that happens.
+    With `since`, only rows created or updated at or after that timestamp are
+    returned. Every page carries the exact matching row count.
+    """
+    filters = None
+    if since:
+        filters = lambda q: q.or_(f'created_at.gte."{since}",updated_at.gte."{since}"')  # noqa: E731
+    return iter_keyset_pages(client, TABLE, INDEX_COLUMNS, key="id", filters=filters)
+
+
+def report_scan(loaded: int, total: Optional[int]) -> None:
+    print(f"  Loaded {loaded} of {total} rows")
+    if total is not None and loaded != total:
+        print(f"  [WARNING] Row count mismatch: table reports {total}, loaded {loaded}")
+
+
+def load_dedup_index(client, profile: str) -> DedupIndex:
+    """
+    Build a DedupIndex from the rows already in expandi_network, paging the
+    table once and filling every check's keys from the same rows.
+    """
+    print(f"Loading dedup index from {TABLE}...")
+    arrays = {check: (array("Q"), array("q")) for check in CHECKS}
+
+    total = None
+    loaded = 0
+    for page in iter_network_pages(client):
+        if total is None:
+            total = page.count
+        add_rows(arrays, page.data)
+        loaded += len(page.data)
+
+    report_scan(loaded, total)
+    index = DedupIndex(profile, store=KeyTable.from_arrays(arrays))
+    for check in index.checks:
+        print(f"  {index.store.count(check)} distinct {check} keys")
+    return index
+
+
+def add_rows(arrays: Dict[str, Tuple[array, array]], rows: Iterable[dict]) -> None:
+    """Append the hashed keys of expandi_network rows to per-check hash/id arrays."""
+    for row in rows:
+        for check, key_fn in CHECKS.items():
+            key = key_fn(row)
+            if key is not None:
+                hashes, ids = arrays[check]
+                hashes.append(key_hash(check, key))
+                ids.append(row["id"])
+
+
+def deduplicate(records: Iterable[dict], index: DedupIndex, stats: dict) -> Iterator[dict]:
+    """
+    Yield records that pass every check in the index, counting the rest in
+    stats by skip reason. Yielded records are reserved in the index straight
+    away so later duplicates in the same batch are caught; the writer adds
+    or releases them once the batch is written (see write_batches).
+    """
+    for record in records:
+        if not record.get("profile_link"):
+            stats["no_profile_link"] += 1
+            continue
+        outcome = index.match(record)
+        if outcome:
+            stats[outcome["reason"]] += 1
+            continue
+        index.reserve(record)
+        yield record
@@ -0,0 +1,154 @@
+"""
+Persistent on-disk dedup index for expandi_network.
+
+Keys for each dedup check are stored as 64-bit hashes in sorted arrays, with
+the matching expandi_network id alongside, and the file is memory-mapped on
+open so a lookup is a binary search over the mapped pages. A JSON sidecar
+keeps the sync watermark; refresh() only fetches rows created or updated
+since then, so the cost of a run scales with the changes, not the table.
+
+The watermark is the newest created_at / updated_at seen, but never later
+than the scan's start minus WATERMARK_LAG: a row written by a transaction
+that commits after the scan carries the earlier now() of that transaction,
+and the next refresh still has to see it. Rows read twice are harmless, the
+first id recorded for a key is kept.
+
+File layout (native byte order):
+    8 bytes                      magic
+    8 bytes per check            key count, in CHECKS order
+    per check, in CHECKS order:  count * uint64 hashes (sorted)
+                                 count * int64 expandi_network ids
+
+Rows deleted from expandi_network are never removed from the index; use
+rebuild() after bulk deletes.
+"""
+
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from contact_import.dedup import CHECKS, TABLE, KeyTable, add_rows, iter_network_pages, report_scan, sort_entries
+
+MAGIC = b"SDIX0001"
+HEADER_SIZE = len(MAGIC) + 8 * len(CHECKS)
+# Longest expected gap between a row's timestamp and its commit
+WATERMARK_LAG = timedelta(seconds=int(os.environ.get("DEDUP_INDEX_WATERMARK_LAG", "600")))
+
+
+def _parse_timestamp(value: str) -> datetime:
+    stamp = datetime.fromisoformat(value)
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _row_timestamp(row: dict) -> Optional[datetime]:
+    stamps = [_parse_timestamp(row[col]) for col in ("created_at", "updated_at") if row.get(col)]
+    return max(stamps) if stamps else None
+
+
+class DedupIndexFile(KeyTable):
+    """A KeyTable whose arrays are memory-mapped from an index file."""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self.meta_path = self.path.with_name(self.path.name + ".json")
+        self.watermark: Optional[str] = None
+        self._file = None
+        self._mmap = None
+        if self.path.exists():
+            self._open()
+
+    @property
+    def exists(self) -> bool:
+        return self._mmap is not None
+
+    def _open(self) -> None:
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a dedup index file")
+
+        view = memoryview(self._mmap)
+        counts = struct.unpack_from(f"{len(CHECKS)}Q", self._mmap, len(MAGIC))
+        offset = HEADER_SIZE
+        for check, count in zip(CHECKS, counts):
+            self._hashes[check] = view[offset:offset + 8 * count].cast("Q")
+            offset += 8 * count
+            self._ids[check] = view[offset:offset + 8 * count].cast("q")
+            offset += 8 * count
+
+        if self.meta_path.exists():
+            with open(self.meta_path, "r") as f:
+                self.watermark = json.load(f).get("watermark")
+
+    def close(self) -> None:
+        for views in (self._hashes, self._ids):
+            for v in views.values():
+                v.release()
+            views.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, arrays: dict, watermark: Optional[str]) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack(f"{len(CHECKS)}Q", *(len(arrays[check][0]) for check in CHECKS)))
+            for check in CHECKS:
+                hashes, ids = arrays[check]
+                hashes.tofile(f)
+                ids.tofile(f)
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        with open(self.meta_path, "w") as f:
+            json.dump({"watermark": watermark, "keys": {c: len(arrays[c][0]) for c in CHECKS}}, f, indent=2)
+        self._open()
+
+    def _sync(self, client, since: Optional[str]) -> int:
+        # Existing entries come first, so a key keeps the id it was first seen with.
+        arrays = {check: self.entries(check) for check in CHECKS}
+        latest = _parse_timestamp(since) if since else None
+        scan_start = datetime.now(timezone.utc)
+
+        total = None
+        loaded = 0
+        for page in iter_network_pages(client, since=since):
+            if total is None:
+                total = page.count
+            add_rows(arrays, page.data)
+            for row in page.data:
+                stamp = _row_timestamp(row)
+                if stamp and (latest is None or stamp > latest):
+                    latest = stamp
+            loaded += len(page.data)
+
+        report_scan(loaded, total)
+        if latest is not None:
+            latest = min(latest, scan_start - WATERMARK_LAG)
+        arrays = {check: sort_entries(*arrays[check]) for check in CHECKS}
+        self._write(arrays, latest.isoformat() if latest else since)
+        return loaded
+
+    def rebuild(self, client) -> int:
+        """Rebuild the index from a full scan of expandi_network."""
+        print(f"Building dedup index {self.path.name} from {TABLE}...")
+        self.close()
+        self.watermark = None
+        return self._sync(client, since=None)
+
+    def refresh(self, client) -> int:
+        """Add keys from rows created or updated since the last sync."""
+        if not self.exists:
+            return self.rebuild(client)
+        print(f"Refreshing dedup index {self.path.name} (rows since {self.watermark})...")
+        return self._sync(client, since=self.watermark)
@@ -0,0 +1,98 @@
+"""
+Parallel parsing for multi-file imports.
+
+CSV files are read and normalized in a process pool, while the caller gets
+them back one file at a time in the order given. Dedup and writes therefore
+stay in a single process and see files in sorted order, so the first file
+still wins on cross-file duplicates.
+
+Workers do not return a file's records in one piece: each worker streams
+them in chunks of `chunk_size` through a bounded queue per file, and blocks
+once `max_chunks` chunks are waiting. At most `workers` files are in flight,
+so at most workers * max_chunks * chunk_size parsed records are held ahead
+of the consumer, however large the files are.
+
+`parse(row, csv_path)` must be picklable: a module-level function, or a
+functools.partial of one.
+"""
+
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from contact_import.reader import iter_batches, iter_csv_rows
+
+CHUNK_SIZE = 1000
+MAX_CHUNKS = 4
+# How often a worker blocked on a full queue checks whether the consumer quit
+PUT_TIMEOUT = 0.5
+
+
+def parse_csv_file(parse: Callable, csv_path: Path, start_row: int, chunks, stop, chunk_size: int) -> None:
+    """Parse a file from `start_row` into `chunks`, ending with None."""
+    try:
+        for chunk in iter_batches((parse(row, csv_path) for row in iter_csv_rows(csv_path, start_row)), chunk_size):
+            while True:
+                if stop.is_set():
+                    return
+                try:
+                    chunks.put(chunk, timeout=PUT_TIMEOUT)
+                    break
+                except queue.Full:
+                    pass
+    finally:
+        if not stop.is_set():
+            chunks.put(None)
+
+
+def _read_chunks(chunks, future) -> Iterator:
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            future.result()
+            return
+        yield from chunk
+
+
+def iter_parsed_files(
+    csv_files: Sequence[Path],
+    parse: Callable,
+    workers: int,
+    start_rows: Optional[Dict[Path, int]] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_chunks: int = MAX_CHUNKS,
+) -> Iterator[Tuple[Path, int, Iterator]]:
+    """
+    Yield (csv_path, start_row, parsed records) for each file, in input order.
+    The records are an iterator fed by the worker; whatever the caller leaves
+    unread is discarded when it moves on to the next file.
+    """
+    start_rows = start_rows or {}
+    files = iter(csv_files)
+    with Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        stop = manager.Event()
+
+        def submit(csv_path):
+            start_row = start_rows.get(csv_path, 0)
+            chunks = manager.Queue(maxsize=max_chunks)
+            future = pool.submit(parse_csv_file, parse, csv_path, start_row, chunks, stop, chunk_size)
+            return csv_path, start_row, chunks, future
+
+        pending = deque(submit(csv_path) for csv_path in islice(files, workers))
+        try:
+            while pending:
+                csv_path, start_row, chunks, future = pending.popleft()
+                next_file = next(files, None)
+                if next_file is not None:
+                    pending.append(submit(next_file))
+                records = _read_chunks(chunks, future)
+                yield csv_path, start_row, records
+                for _ in records:
+                    pass
+        finally:
+            # The consumer stopped early: let blocked workers exit
+            stop.set()
@@ -0,0 +1,153 @@
+"""
+Contact import pipeline: read -> normalize -> dedup -> batch-write.
+
+With several workers, read + normalize runs in a process pool per file
+(contact_import.parallel) and dedup + writes stay here, in file order.
+"""
+
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+from contact_import.dedup import DedupIndex, deduplicate
+from contact_import.parallel import iter_parsed_files
+from contact_import.progress import ImportProgress
+from contact_import.reader import iter_batches, iter_csv_rows
+from contact_import.records import network_record
+from contact_import.writer import insert_records, is_duplicate_key_error
+from supabase_io.client import DeadLetterFile
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def write_batches(
+    client,
+    records,
+    stats: Counter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dead_letter: Optional[DeadLetterFile] = None,
+    on_batch: Optional[Callable[[list], None]] = None,
+    index: Optional[DedupIndex] = None,
+) -> None:
+    """
+    Insert records in batches. With `index`, the dedup keys of inserted rows
+    are registered and those of failed rows released, so a dead-lettered row
+    does not make later rows with the same keys look like duplicates.
+    """
+    for batch in iter_batches(records, batch_size):
+        failures = insert_records(client, batch)
+        stats["inserted"] += len(batch) - len(failures)
+        if index is not None:
+            failed = {id(record) for record, _ in failures}
+            for record in batch:
+                index.release(record)
+                if id(record) not in failed:
+                    index.add(record)
+        for record, error in failures:
+            if is_duplicate_key_error(error):
+                stats["profile_link_match"] += 1
+            else:
+                stats["errors"] += 1
+                print(f"  Error inserting {record['profile_link']}: {error}")
+                if dead_letter is not None:
+                    dead_letter.append("contact_import", record, error)
+        if on_batch is not None:
+            on_batch(batch)
+
+
+def format_stats(stats: Counter, checks) -> str:
+    parts = [f"Inserted: {stats['inserted']}"]
+    parts += [f"Skipped by {check}: {stats[f'{check}_match']}" for check in checks]
+    parts.append(f"No profile_link: {stats['no_profile_link']}")
+    if stats["errors"]:
+        parts.append(f"Errors: {stats['errors']}")
+    return ", ".join(parts)
+
+
+def parse_network_row(row: dict, csv_path: Path, source: Optional[str]) -> dict:
+    return network_record(row, csv_path.stem, source)
+
+
+def commit_records(
+    client,
+    csv_path: Path,
+    records: Iterable[dict],
+    index: DedupIndex,
+    stats: Counter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dead_letter: Optional[DeadLetterFile] = None,
+    progress: Optional[ImportProgress] = None,
+    start_row: int = 0,
+) -> Counter:
+    """
+    Dedup and write the normalized rows of one file, starting at `start_row`.
+    With `progress`, the file is checkpointed after every batch at the row
+    after the batch's last record; rows skipped by dedup past that point are
+    simply checked again on resume.
+    """
+    print(f"Processing: {csv_path.name}" + (f" (starting from row {start_row})" if start_row else ""))
+
+    file_stats = Counter()
+    row_numbers = {}
+    rows_done = start_row
+
+    def numbered():
+        nonlocal rows_done
+        for record in records:
+            row_numbers[id(record)] = rows_done
+            rows_done += 1
+            yield record
+
+    def checkpoint(batch):
+        if progress is not None:
+            progress.update(csv_path.name, row_numbers[id(batch[-1])] + 1)
+        row_numbers.clear()
+
+    write_batches(
+        client, deduplicate(numbered(), index, file_stats), file_stats, batch_size, dead_letter, checkpoint, index
+    )
+    if progress is not None:
+        progress.update(csv_path.name, rows_done)
+
+    print(f"  {format_stats(file_stats, index.checks)}")
+
+    stats.update(file_stats)
+    stats["files_processed"] += 1
+    return file_stats
+
+
+def import_csv_file(
+    client,
+    csv_path: Path,
+    index: DedupIndex,
+    source: Optional[str],
+    stats: Counter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dead_letter: Optional[DeadLetterFile] = None,
+    progress: Optional[ImportProgress] = None,
+) -> Counter:
+    start_row = progress.get(csv_path.name) if progress is not None else 0
+    records = (parse_network_row(row, csv_path, source) for row in iter_csv_rows(csv_path, start_row))
+    return commit_records(client, csv_path, records, index, stats, batch_size, dead_letter, progress, start_row)
+
+
+def import_csv_files_parallel(
+    client,
+    csv_files: Sequence[Path],
+    index: DedupIndex,
+    source: Optional[str],
+    stats: Counter,
+    workers: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dead_letter: Optional[DeadLetterFile] = None,
+    progress: Optional[ImportProgress] = None,
+) -> None:
+    """
+    Parse and normalize files in a process pool; dedup and write them here,
+    one file at a time in the given order.
+    """
+    start_rows = {p: progress.get(p.name) for p in csv_files} if progress is not None else {}
+    parse = partial(parse_network_row, source=source)
+    for csv_path, start_row, records in iter_parsed_files(csv_files, parse, workers, start_rows):
+        commit_records(client, csv_path, records, index, stats, batch_size, dead_letter, progress, start_row)
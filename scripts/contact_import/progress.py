@@ -0,0 +1,24 @@
+"""
+Per-file import checkpoints, stored as {"<file name>": <rows done>} in JSON
+(the import_progress.json format of load_expandi_csv_to_supabase.py).
+"""
+
+import json
+from pathlib import Path
+
+
+class ImportProgress:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.rows = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.rows = json.load(f)
+
+    def get(self, file_name: str) -> int:
+        return self.rows.get(file_name, 0)
+
+    def update(self, file_name: str, rows_done: int) -> None:
+        self.rows[file_name] = rows_done
+        with open(self.path, "w") as f:
+            json.dump(self.rows, f, indent=2)
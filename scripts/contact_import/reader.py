@@ -0,0 +1,39 @@
+"""
+Streaming CSV reader shared by the importers.
+
+Rows are yielded one at a time straight from csv.DictReader, so memory stays
+flat regardless of how large the export is. Already-processed rows are skipped
+without being kept around.
+"""
+
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+def iter_csv_rows(csv_path: Path, start_row: int = 0, encoding: str = "utf-8") -> Iterator[dict]:
+    """Yield CSV rows as dicts, starting at the given 0-based data row."""
+    with open(csv_path, "r", encoding=encoding, newline="") as f:
+        reader = csv.DictReader(f)
+        yield from islice(reader, start_row, None)
+
+
+def count_csv_rows(csv_path: Path, encoding: str = "utf-8") -> int:
+    """Count data rows (excluding the header) without holding them in memory."""
+    with open(csv_path, "r", encoding=encoding, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return sum(1 for row in reader if row)
+
+
+def iter_batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
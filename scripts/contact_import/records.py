@@ -0,0 +1,50 @@
+"""
+Row-to-record normalization for expandi_network imports.
+"""
+
+from typing import Optional
+
+
+def parse_int(value: str) -> int | None:
+    if not value or value.strip() == "":
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def network_record(row: dict, source_file: str, source: Optional[str]) -> dict:
+    """Map an Expandi / Juicebox CSV row onto the expandi_network columns."""
+    profile_link = (row.get("profile_link") or "").strip()
+    email = (row.get("email") or "").strip()
+    return {
+        "id": parse_int(row.get("id", "")),
+        "first_name": row.get("first_name") or None,
+        "last_name": row.get("last_name") or None,
+        "profile_link": profile_link or None,
+        "job_title": row.get("job_title") or None,
+        "company_name": row.get("company_name") or None,
+        "email": email or None,
+        "phone": row.get("phone") or None,
+        "address": row.get("address") or None,
+        "image_link": row.get("image_link") or None,
+        "object_urn": parse_int(row.get("object_urn", "")),
+        "public_identifier": row.get("public_identifier") or None,
+        "profile_link_public_identifier": row.get("profile_link_public_identifier") or None,
+        "follower_count": parse_int(row.get("follower_count", "")),
+        "contact_status": row.get("contact_status") or None,
+        "conversation_status": row.get("conversation_status") or None,
+        "company_universal_name": row.get("company_universal_name") or None,
+        "company_website": row.get("company_website") or None,
+        "employee_count_start": parse_int(row.get("employee_count_start", "")),
+        "employee_count_end": parse_int(row.get("employee_count_end", "")),
+        "industries": row.get("industries") or None,
+        "location": row.get("location") or None,
+        "thread": row.get("thread") or None,
+        "connected_at": row.get("connected_at") or None,
+        "concat_tags": row.get("concat_tags") or None,
+        "owned_by": row.get("owned_by") or None,
+        "source_file": source_file,
+        "source": source,
+    }
@@ -0,0 +1,34 @@
+"""
+Batched writes to expandi_network.
+"""
+
+from typing import List, Tuple
+
+from supabase_io.client import call, is_row_error
+
+TABLE = "expandi_network"
+
+
+def is_duplicate_key_error(error: Exception) -> bool:
+    return "duplicate key" in str(error).lower()
+
+
+def insert_records(client, records: List[dict], table: str = TABLE) -> List[Tuple[dict, Exception]]:
+    """
+    Insert records in a single request. A request rejected for its rows
+    (is_row_error) commits nothing, so the batch is split in half and resent
+    until every bad row is isolated. Any other failure may have committed
+    after the response was lost, so the whole batch is reported as failed
+    rather than sent again. Transient failures are retried first where that
+    is safe (see supabase_io.client).
+    Returns (record, error) for each row that could not be inserted.
+    """
+    try:
+        call(client.table(table).insert(records).execute, idempotent=False)
+        return []
+    except Exception as e:
+        if len(records) == 1 or not is_row_error(e):
+            return [(record, e) for record in records]
+
+    mid = len(records) // 2
+    return insert_records(client, records[:mid], table) + insert_records(client, records[mid:], table)
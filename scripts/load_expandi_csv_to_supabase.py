@@ -1,17 +1,24 @@
-import csv
 import json
 import os
 from pathlib import Path
-from supabase import create_client
+from typing import Iterable
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_SERVICE_ROLE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+from contact_import.parallel import iter_parsed_files
+from contact_import.reader import count_csv_rows, iter_batches, iter_csv_rows
+from supabase_io.client import DeadLetterFile, call, get_client, is_row_error
 
 SCRIPT_DIR = Path(__file__).parent
 CSV_DIR = SCRIPT_DIR.parent / "data" / "searches_exported"
 PROGRESS_FILE = SCRIPT_DIR / "import_progress.json"
+DEAD_LETTER_FILE = SCRIPT_DIR / "dead_letter.jsonl"
 
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Rows sent per insert request. 1 reproduces the old row-by-row behaviour.
+BATCH_SIZE = int(os.environ.get("EXPANDI_BATCH_SIZE", "500"))
+# Processes used to parse CSV files. Inserts always run here, file by file in
+# sorted order.
+WORKERS = int(os.environ.get("EXPANDI_IMPORT_WORKERS", "1"))
+
+dead_letter = DeadLetterFile(DEAD_LETTER_FILE)
 
 
 def load_progress() -> dict:
@@ -41,62 +48,117 @@ def parse_bigint(value: str) -> int | None:
         return None
 
 
-def load_csv_to_supabase(csv_path: Path, progress: dict):
+def build_record(row: dict, search_name: str) -> dict:
+    return {
+        "webhook_event": "manual_import",
+        "search_name": search_name,
+        "campaign_name": None,
+        "expandi_contact_id": parse_bigint(row.get("id", "")),
+        "first_name": row.get("first_name") or None,
+        "last_name": row.get("last_name") or None,
+        "profile_link": row.get("profile_link") or None,
+        "job_title": row.get("job_title") or None,
+        "company_name": row.get("company_name") or None,
+        "email": row.get("email") or None,
+        "phone": row.get("phone") or None,
+        "address": row.get("address") or None,
+        "object_urn": parse_bigint(row.get("object_urn", "")),
+        "image_link": row.get("image_link") or None,
+        "tags": row.get("concat_tags") or None,
+        "contact_status": row.get("contact_status") or None,
+        "conversation_status": row.get("conversation_status") or None,
+        "connected_at": parse_connected_at(row.get("connected_at", "")),
+    }
+
+
+def parse_row(row: dict, csv_path: Path) -> dict:
+    return build_record(row, csv_path.stem)
+
+
+def insert_batch(records: list[dict]) -> tuple[int, Exception | None]:
+    """
+    Insert records in a single request. A request rejected for its rows
+    (is_row_error) commits nothing, so the batch is split in half and resent
+    until the offending row is isolated. Any other failure may have committed
+    after the response was lost and is returned without resending. Transient
+    errors are retried first where that is safe. Returns the number of
+    leading records that were committed and the error that stopped the batch
+    (None if everything was inserted).
+    """
+    client = get_client()
+    try:
+        call(client.table("expandi_campaign_events").insert(records).execute, idempotent=False)
+        return len(records), None
+    except Exception as e:
+        if len(records) == 1 or not is_row_error(e):
+            return 0, e
+    
+    mid = len(records) // 2
+    committed, error = insert_batch(records[:mid])
+    if error:
+        return committed, error
+    committed, error = insert_batch(records[mid:])
+    return mid + committed, error
+
+
+def load_csv_to_supabase(
+    csv_path: Path,
+    progress: dict,
+    parsed: Iterable[dict] | None = None,
+    total_rows: int | None = None,
+):
+    """
+    Insert one file from its checkpointed row onwards. `parsed` streams the
+    file's records from that row on when they are built in a worker process;
+    `total_rows` is the file's row count when the caller already has it.
+    """
     filename = csv_path.name
     search_name = csv_path.stem
     
     start_row = progress.get(filename, 0)
     print(f"Processing: {filename} (search_name: {search_name}, starting from row {start_row})")
     
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    if total_rows is None:
+        total_rows = count_csv_rows(csv_path)
     
-    if start_row >= len(rows):
-        print(f"  Already completed ({len(rows)} rows)")
+    if start_row >= total_rows:
+        print(f"  Already completed ({total_rows} rows)")
         return
     
-    rows_to_process = rows[start_row:]
+    if parsed is None:
+        parsed = (parse_row(row, csv_path) for row in iter_csv_rows(csv_path, start_row))
     inserted_count = 0
     
-    for i, row in enumerate(rows_to_process):
-        record = {
-            "webhook_event": "manual_import",
-            "search_name": search_name,
-            "campaign_name": None,
-            "expandi_contact_id": parse_bigint(row.get("id", "")),
-            "first_name": row.get("first_name") or None,
-            "last_name": row.get("last_name") or None,
-            "profile_link": row.get("profile_link") or None,
-            "job_title": row.get("job_title") or None,
-            "company_name": row.get("company_name") or None,
-            "email": row.get("email") or None,
-            "phone": row.get("phone") or None,
-            "address": row.get("address") or None,
-            "object_urn": parse_bigint(row.get("object_urn", "")),
-            "image_link": row.get("image_link") or None,
-            "tags": row.get("concat_tags") or None,
-            "contact_status": row.get("contact_status") or None,
-            "conversation_status": row.get("conversation_status") or None,
-            "connected_at": parse_connected_at(row.get("connected_at", "")),
-        }
+    for batch_index, records in enumerate(iter_batches(parsed, BATCH_SIZE)):
+        batch_start = batch_index * BATCH_SIZE
         
-        try:
-            supabase.table("expandi_campaign_events").insert(record).execute()
-            inserted_count += 1
-            progress[filename] = start_row + i + 1
-            
-            if inserted_count % 50 == 0:
-                save_progress(progress)
-                print(f"  Progress: {inserted_count} rows inserted (total: {progress[filename]}/{len(rows)})")
-                
-        except Exception as e:
+        # A rejected row goes to the dead-letter file and the rest of the
+        # batch carries on after it. After an error that may have committed
+        # (e.g. a timeout), the rest of the batch is dead-lettered instead of
+        # being sent again, as expandi_campaign_events has no key to catch
+        # duplicates.
+        done = 0
+        while done < len(records):
+            committed, error = insert_batch(records[done:])
+            inserted_count += committed
+            done += committed
+            if error:
+                failed = 1 if is_row_error(error) else len(records) - done
+                print(f"  Error at row {start_row + batch_start + done} ({failed} rows): {error}")
+                for i in range(done, done + failed):
+                    dead_letter.append(
+                        "load_expandi_csv_to_supabase",
+                        {"file": filename, "row": start_row + batch_start + i, "record": records[i]},
+                        error,
+                    )
+                done += failed
+            progress[filename] = start_row + batch_start + done
             save_progress(progress)
-            print(f"  Error at row {start_row + i}: {e}")
-            raise
+        
+        print(f"  Progress: {inserted_count} rows inserted (total: {progress[filename]}/{total_rows})")
     
     save_progress(progress)
-    print(f"  Completed: {inserted_count} new rows (total: {progress[filename]}/{len(rows)})")
+    print(f"  Completed: {inserted_count} new rows (total: {progress[filename]}/{total_rows})")
 
 
 def main():
@@ -110,10 +172,20 @@ def main():
     print(f"Found {len(csv_files)} CSV files to process")
     print(f"Progress file: {PROGRESS_FILE}\n")
     
-    for csv_path in csv_files:
-        load_csv_to_supabase(csv_path, progress)
-        print()
+    if WORKERS > 1:
+        total_rows = {p: count_csv_rows(p) for p in csv_files}
+        pending = [p for p in csv_files if progress.get(p.name, 0) < total_rows[p]]
+        start_rows = {p: progress.get(p.name, 0) for p in pending}
+        for csv_path, _, parsed in iter_parsed_files(pending, parse_row, WORKERS, start_rows):
+            load_csv_to_supabase(csv_path, progress, parsed, total_rows[csv_path])
+            print()
+    else:
+        for csv_path in csv_files:
+            load_csv_to_supabase(csv_path, progress)
+            print()
     
+    if dead_letter.count:
+        print(f"{dead_letter.count} rows failed, written to {DEAD_LETTER_FILE}")
     print("Done!")
 
 
@@ -3,36 +3,39 @@ Extract the latest dates from each resume in the textkernel normalized tables.
 Outputs TWO CSVs:
   1. resume_latest_dates_all.csv - Uses ALL dates (start + end + last_education_date)
   2. resume_latest_dates_start_only.csv - Uses only START dates
+
+By default both CSVs are written from the resume_latest_dates view
+(migrations/08_resume_latest_dates_view.sql), which computes both modes
+server-side and returns one row per resume. Pass --client-side to fetch the
+textkernel tables and compute the dates locally instead.
+
+Client-side, textkernel_education and textkernel_positions are fetched once
+each into a DateIndex of parsed ordinal dates, and every output variant is
+derived from it: all, start_only, end_only, positions_only, plus an optional
+"all dates within the last N years" variant. Requesting variants other than
+the default pair implies --client-side.
+
+Usage:
+    python extract_resume_latest_dates.py [--client-side]
+    python extract_resume_latest_dates.py --variants all,start_only,end_only,positions_only --within-years 5
 """
 
-import os
+import argparse
 import csv
+import sys
+from array import array
 from datetime import date
-from supabase import create_client, Client
-
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
+from pathlib import Path
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables must be set")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from supabase_io.client import get_client  # noqa: E402
+from supabase_io.scan import iter_rows  # noqa: E402
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+OUTPUT_FIELDS = ["file_name", "person_name", "latest_date", "latest_date_source", "total_dates_found"]
 
-PAGE_SIZE = 1000
 
-
-def fetch_all_paginated(table_name, select_columns):
-    all_rows = []
-    offset = 0
-    while True:
-        response = supabase.table(table_name).select(select_columns).range(offset, offset + PAGE_SIZE - 1).execute()
-        if not response.data:
-            break
-        all_rows.extend(response.data)
-        if len(response.data) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
-    return all_rows
+def fetch_all_paginated(table_name, select_columns, order_column="id"):
+    return list(iter_rows(get_client(), table_name, select_columns, key=order_column))
 
 
 def get_all_resumes():
@@ -41,7 +44,7 @@ def get_all_resumes():
 
 
 def get_resume_names():
-    rows = fetch_all_paginated("textkernel_contact", "resume_id, formatted_name, given_name, family_name")
+    rows = fetch_all_paginated("textkernel_contact", "id, resume_id, formatted_name, given_name, family_name")
     names = {}
     for r in rows:
         name = r.get("formatted_name")
@@ -53,54 +56,28 @@ def get_resume_names():
     return names
 
 
-def get_education_dates_all():
-    rows = fetch_all_paginated("textkernel_education", "resume_id, start_date, end_date, last_education_date")
-    dates = {}
-    for r in rows:
-        resume_id = r["resume_id"]
-        if resume_id not in dates:
-            dates[resume_id] = []
-        for field in ["start_date", "end_date", "last_education_date"]:
-            if r.get(field):
-                dates[resume_id].append(("education", field, r[field]))
-    return dates
-
-
-def get_education_dates_start_only():
-    rows = fetch_all_paginated("textkernel_education", "resume_id, start_date")
-    dates = {}
-    for r in rows:
-        resume_id = r["resume_id"]
-        if resume_id not in dates:
-            dates[resume_id] = []
-        if r.get("start_date"):
-            dates[resume_id].append(("education", "start_date", r["start_date"]))
-    return dates
+# Every date column read from the textkernel tables. A date's position in this
+# list is the code stored for it in the DateIndex.
+DATE_FIELDS = [
+    ("education", "start_date"),
+    ("education", "end_date"),
+    ("education", "last_education_date"),
+    ("position", "start_date"),
+    ("position", "end_date"),
+]
 
+# Output variants derived from the same DateIndex: name -> (date codes, output file, label)
+VARIANTS = {
+    "all": ({0, 1, 2, 3, 4}, "resume_latest_dates_all.csv", "ALL dates (start+end)"),
+    "start_only": ({0, 3}, "resume_latest_dates_start_only.csv", "START dates only"),
+    "end_only": ({1, 4}, "resume_latest_dates_end_only.csv", "END dates only"),
+    "positions_only": ({3, 4}, "resume_latest_dates_positions_only.csv", "POSITION dates only"),
+}
+DEFAULT_VARIANTS = ["all", "start_only"]
 
-def get_position_dates_all():
-    rows = fetch_all_paginated("textkernel_positions", "resume_id, start_date, end_date")
-    dates = {}
-    for r in rows:
-        resume_id = r["resume_id"]
-        if resume_id not in dates:
-            dates[resume_id] = []
-        for field in ["start_date", "end_date"]:
-            if r.get(field):
-                dates[resume_id].append(("position", field, r[field]))
-    return dates
-
-
-def get_position_dates_start_only():
-    rows = fetch_all_paginated("textkernel_positions", "resume_id, start_date")
-    dates = {}
-    for r in rows:
-        resume_id = r["resume_id"]
-        if resume_id not in dates:
-            dates[resume_id] = []
-        if r.get("start_date"):
-            dates[resume_id].append(("position", "start_date", r["start_date"]))
-    return dates
+# Ordinal stored for a date value that is present but cannot be parsed. It
+# counts towards total_dates_found but never wins as the latest date.
+UNPARSEABLE = 0
 
 
 def parse_date(date_str):
@@ -114,40 +91,83 @@ def parse_date(date_str):
         return None
 
 
-def find_latest_date(all_dates):
-    latest = None
-    latest_source = None
-    for source, field, date_str in all_dates:
-        d = parse_date(date_str)
-        if d and (latest is None or d > latest):
-            latest = d
-            latest_source = f"{source}.{field}"
-    return latest, latest_source
-
-
-def process_and_write_csv(resumes, names, education_dates, position_dates, output_file, label):
-    print(f"\nProcessing {label}...")
+class DateIndex:
+    """
+    Per-resume parsed dates, kept as parallel arrays of ordinals and DATE_FIELDS
+    codes. Education dates are added before position dates, so on ties the
+    first date in array order wins, as in the original per-variant loops.
+    """
+
+    def __init__(self):
+        self.ordinals = {}
+        self.codes = {}
+
+    def add(self, resume_id, code, value):
+        if resume_id not in self.ordinals:
+            self.ordinals[resume_id] = array("l")
+            self.codes[resume_id] = array("B")
+        d = parse_date(value)
+        self.ordinals[resume_id].append(d.toordinal() if d else UNPARSEABLE)
+        self.codes[resume_id].append(code)
+
+    def latest(self, resume_id, codes, min_ordinal=None):
+        """Return (latest date, source, dates found) for the given date codes."""
+        latest = UNPARSEABLE
+        latest_code = None
+        found = 0
+        for ordinal, code in zip(self.ordinals.get(resume_id, ()), self.codes.get(resume_id, ())):
+            if code not in codes:
+                continue
+            if min_ordinal is not None and ordinal < min_ordinal:
+                continue
+            found += 1
+            if ordinal > latest:
+                latest = ordinal
+                latest_code = code
+        if latest_code is None:
+            return None, None, found
+        source, field = DATE_FIELDS[latest_code]
+        return date.fromordinal(latest), f"{source}.{field}", found
+
+
+def load_date_index():
+    """Fetch textkernel_education and textkernel_positions once each into a DateIndex."""
+    index = DateIndex()
+    for table in ("education", "position"):
+        fields = [(code, field) for code, (source, field) in enumerate(DATE_FIELDS) if source == table]
+        table_name = "textkernel_education" if table == "education" else "textkernel_positions"
+        print(f"Fetching {table} dates...")
+        rows = fetch_all_paginated(table_name, ", ".join(["id", "resume_id"] + [field for _, field in fields]))
+        for r in rows:
+            for code, field in fields:
+                if r.get(field):
+                    index.add(r["resume_id"], code, r[field])
+    return index
+
+
+def build_results(resumes, names, index, codes, min_ordinal=None):
     results = []
     for resume_id, file_name in resumes.items():
-        all_dates = []
-        all_dates.extend(education_dates.get(resume_id, []))
-        all_dates.extend(position_dates.get(resume_id, []))
-        
-        latest_date, latest_source = find_latest_date(all_dates)
+        latest_date, latest_source, total = index.latest(resume_id, codes, min_ordinal)
         
         results.append({
             "file_name": file_name,
             "person_name": names.get(resume_id, "Unknown"),
             "latest_date": latest_date.isoformat() if latest_date else None,
             "latest_date_source": latest_source,
-            "total_dates_found": len(all_dates)
+            "total_dates_found": total
         })
+    return results
+
+
+def write_csv(results, output_file, label):
+    print(f"\nProcessing {label}...")
 
     # Sort: newest first, None values at the end
     results.sort(key=lambda x: (x["latest_date"] is not None, x["latest_date"] or "1900-01-01"), reverse=True)
 
     with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["file_name", "person_name", "latest_date", "latest_date_source", "total_dates_found"])
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
         writer.writeheader()
         writer.writerows(results)
 
@@ -162,7 +182,41 @@ def process_and_write_csv(resumes, names, education_dates, position_dates, outpu
             print(f"    {r['latest_date']} | {r['person_name'][:25]:<25} | {r['file_name'][:35]}")
 
 
-def main():
+def main_server_side():
+    print("Fetching latest dates from resume_latest_dates view...")
+    rows = fetch_all_paginated(
+        "resume_latest_dates",
+        "resume_id, file_name, person_name, latest_date, latest_date_source, total_dates_found, "
+        "latest_start_date, latest_start_date_source, total_start_dates_found",
+        order_column="resume_id",
+    )
+    print(f"Found {len(rows)} resumes")
+
+    all_results = []
+    start_results = []
+    for r in rows:
+        all_results.append({
+            "file_name": r["file_name"],
+            "person_name": r["person_name"],
+            "latest_date": r["latest_date"],
+            "latest_date_source": r["latest_date_source"],
+            "total_dates_found": r["total_dates_found"],
+        })
+        start_results.append({
+            "file_name": r["file_name"],
+            "person_name": r["person_name"],
+            "latest_date": r["latest_start_date"],
+            "latest_date_source": r["latest_start_date_source"],
+            "total_dates_found": r["total_start_dates_found"],
+        })
+
+    write_csv(all_results, "resume_latest_dates_all.csv", "ALL dates (start+end)")
+    write_csv(start_results, "resume_latest_dates_start_only.csv", "START dates only")
+
+    print("\n=== Done! ===")
+
+
+def main_client_side(variants, within_years=None):
     print("Fetching resumes...")
     resumes = get_all_resumes()
     print(f"Found {len(resumes)} resumes")
@@ -170,22 +224,49 @@ def main():
     print("Fetching contact names...")
     names = get_resume_names()
 
-    # Version 1: All dates (start + end + last_education_date)
-    print("\nFetching ALL education dates...")
-    edu_all = get_education_dates_all()
-    print("Fetching ALL position dates...")
-    pos_all = get_position_dates_all()
-    process_and_write_csv(resumes, names, edu_all, pos_all, "resume_latest_dates_all.csv", "ALL dates (start+end)")
-
-    # Version 2: Start dates only
-    print("\nFetching START-ONLY education dates...")
-    edu_start = get_education_dates_start_only()
-    print("Fetching START-ONLY position dates...")
-    pos_start = get_position_dates_start_only()
-    process_and_write_csv(resumes, names, edu_start, pos_start, "resume_latest_dates_start_only.csv", "START dates only")
+    index = load_date_index()
+
+    for name in variants:
+        codes, output_file, label = VARIANTS[name]
+        write_csv(build_results(resumes, names, index, codes), output_file, label)
+
+    if within_years is not None:
+        today = date.today()
+        try:
+            cutoff = today.replace(year=today.year - within_years)
+        except ValueError:
+            cutoff = today.replace(year=today.year - within_years, day=28)
+        codes, _, _ = VARIANTS["all"]
+        write_csv(
+            build_results(resumes, names, index, codes, min_ordinal=cutoff.toordinal()),
+            f"resume_latest_dates_within_{within_years}y.csv",
+            f"ALL dates within {within_years} years (since {cutoff.isoformat()})",
+        )
 
     print("\n=== Done! ===")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Extract the latest dates from each resume.")
+    parser.add_argument("--client-side", action="store_true", help="Compute dates locally from the textkernel tables")
+    parser.add_argument(
+        "--variants",
+        default=",".join(DEFAULT_VARIANTS),
+        help=f"Comma-separated client-side variants: {', '.join(VARIANTS)} (default: %(default)s)",
+    )
+    parser.add_argument("--within-years", type=int, help="Also write a variant limited to the last N years (client-side)")
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"Unknown variants: {', '.join(unknown)}")
+
+    if args.client_side or variants != DEFAULT_VARIANTS or args.within_years is not None:
+        main_client_side(variants, args.within_years)
+    else:
+        main_server_side()
+
+
 if __name__ == "__main__":
     main()
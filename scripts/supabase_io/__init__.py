@@ -0,0 +1,3 @@
+"""
+Shared Supabase / PostgREST helpers for the scripts in this directory.
+"""
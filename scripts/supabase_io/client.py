@@ -0,0 +1,208 @@
+"""
+Shared Supabase client with connection pooling, bounded concurrency and retries.
+
+get_client() returns one client per process, created on first use instead of
+at import time. Its PostgREST requests go through a single keep-alive
+httpx.Client pool (SUPABASE_MAX_CONNECTIONS connections) when the installed
+supabase-py accepts one; older versions already reuse one session per client.
+
+call() runs a request with at most SUPABASE_MAX_CONNECTIONS requests in flight
+across threads and retries transient failures (429, 5xx, timeouts, dropped
+connections) with exponential backoff and jitter. Requests that are not
+idempotent, such as plain inserts, are only retried when the failure means
+the server did not process them (connection refused, 429, PostgREST could not
+reach the database), so a retry cannot write the same rows twice.
+is_row_error() tells a failed insert that certainly committed nothing because
+of the rows it sent (4xx, data and constraint errors) from one that may have
+committed before the response was lost; only the former may be split and
+resent.
+
+DeadLetterFile appends rows that still fail to a local JSONL file, one entry
+per row with the same fields as the failed_jobs retry queue
+(workflow_name, input_payload, error_text, resolved).
+
+Settings (environment):
+    SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY (or SUPABASE_SERVICE_KEY)
+    SUPABASE_MAX_CONNECTIONS   default 10
+    SUPABASE_MAX_RETRIES       default 5
+    SUPABASE_RETRY_BASE_DELAY  seconds, default 0.5
+    SUPABASE_TIMEOUT           seconds, default 30
+"""
+
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "10"))
+MAX_RETRIES = int(os.environ.get("SUPABASE_MAX_RETRIES", "5"))
+RETRY_BASE_DELAY = float(os.environ.get("SUPABASE_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = 30.0
+TIMEOUT = float(os.environ.get("SUPABASE_TIMEOUT", "30"))
+
+# HTTP statuses worth retrying. Only 429 and 503 are known not to have been
+# processed; a 500/502/504 may have committed before the response was lost.
+RETRY_STATUSES = {"429", "500", "502", "503", "504"}
+UNPROCESSED_STATUSES = {"429", "503"}
+# Postgres / PostgREST codes for failures that are safe to retry:
+# connection exceptions (08xxx), serialization failure, deadlock, too many
+# connections, and PostgREST being unable to reach the database.
+RETRY_CODES = {"40001", "40P01", "53300", "PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+T = TypeVar("T")
+
+_client = None
+_client_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONNECTIONS)
+
+
+def _client_options():
+    from supabase import ClientOptions
+
+    options = {"postgrest_client_timeout": TIMEOUT}
+    try:
+        import httpx
+    except ImportError:
+        return ClientOptions(**options)
+
+    if "httpx_client" in inspect.signature(ClientOptions).parameters:
+        options["httpx_client"] = httpx.Client(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=TIMEOUT,
+        )
+    return ClientOptions(**options)
+
+
+def create_supabase_client(url: Optional[str] = None, key: Optional[str] = None):
+    from supabase import create_client
+
+    url = url or os.environ.get("SUPABASE_URL")
+    key = key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_SERVICE_KEY")
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables must be set")
+    return create_client(url, key, options=_client_options())
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_supabase_client()
+        return _client
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    code = getattr(error, "code", None)
+    if code is None:
+        response = getattr(error, "response", None)
+        code = getattr(response, "status_code", None)
+    return None if code is None else str(code)
+
+
+def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """
+    True if `error` is a transient failure worth retrying. For requests that
+    are not idempotent, only failures where the request never reached the
+    database count.
+    """
+    try:
+        import httpx
+    except ImportError:
+        httpx = None
+
+    if httpx is not None:
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True
+        if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+            return idempotent
+    elif isinstance(error, (ConnectionError, TimeoutError)):
+        return idempotent
+
+    code = _error_code(error)
+    if code is None:
+        return False
+    if code in UNPROCESSED_STATUSES or code.startswith("08") or code in RETRY_CODES:
+        return True
+    return idempotent and code in RETRY_STATUSES
+
+
+def is_row_error(error: Exception) -> bool:
+    """
+    True if `error` is a deterministic rejection of the request's rows
+    (PostgREST 4xx, Postgres data exceptions 22xxx or integrity constraint
+    violations 23xxx). Such a request committed nothing and fails again with
+    the same rows; anything else may have committed.
+    """
+    code = _error_code(error)
+    if code is None:
+        return False
+    if code[:2] in ("22", "23"):
+        return True
+    return len(code) == 3 and code.startswith("4") and code not in ("408", "429")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def call(request: Callable[[], T], idempotent: bool = True, max_retries: int = MAX_RETRIES) -> T:
+    """
+    Run `request` (e.g. lambda: query.execute()) under the shared concurrency
+    limit, retrying transient failures. The last error is re-raised.
+    """
+    attempt = 0
+    while True:
+        try:
+            with _slots:
+                return request()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e, idempotent):
+                raise
+            delay = backoff_delay(attempt)
+            print(f"  [retry {attempt + 1}/{max_retries}] {type(e).__name__}: {e} (waiting {delay:.1f}s)")
+            time.sleep(delay)
+            attempt += 1
+
+
+class DeadLetterFile:
+    """Append-only JSONL file of rows that could not be written."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, workflow_name: str, payload: dict, error: Exception) -> None:
+        entry = {
+            "workflow_name": workflow_name,
+            "input_payload": payload,
+            "error_text": str(error),
+            "resolved": False,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+            self.count += 1
+
+    def entries(self, workflow_name: Optional[str] = None) -> Iterator[dict]:
+        """Yield unresolved entries, optionally only those of one workflow."""
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("resolved"):
+                    continue
+                if workflow_name and entry["workflow_name"] != workflow_name:
+                    continue
+                yield entry
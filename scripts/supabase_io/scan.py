@@ -0,0 +1,162 @@
+"""
+Full-table reads through PostgREST.
+
+iter_pages() requests the first page with count="exact", then fetches the
+following OFFSET pages concurrently on a bounded thread pool and yields them
+in key order as they complete. Past max_offset, where every OFFSET page makes
+Postgres walk and discard the rows before it, the scan continues with keyset
+pagination on the key column (key > last seen) until a short page, which also
+picks up rows added after the count was taken. A short page ends the scan.
+
+iter_keyset_pages() is the plain cursor scan: every page is
+WHERE key > last_seen ORDER BY key LIMIT page_size, so each request costs the
+same regardless of depth and rows inserted or deleted mid-scan cannot shift
+page boundaries (no skipped or duplicated rows). Pages carry their last key
+as `cursor`, which can be passed back as `after` to resume a scan. Pass
+keyset=True to iter_pages() / iter_rows(), or set SUPABASE_SCAN_MODE=keyset
+to make it the default, to switch an existing caller over.
+
+Requests go through supabase_io.client.call(), so they share its
+concurrency limit and retries. The client is passed in, so a scan can run
+against any PostgREST-compatible endpoint, e.g. a local PostgREST in front of
+a scratch database, or the in-memory stub in tests/postgrest_stub.py.
+
+Usage:
+    for row in iter_rows(client, "textkernel_positions", "id, resume_id, start_date"):
+        ...
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional
+
+from supabase_io.client import call
+
+PAGE_SIZE = 1000
+SCAN_WORKERS = int(os.environ.get("SUPABASE_SCAN_WORKERS", "4"))
+MAX_OFFSET = int(os.environ.get("SUPABASE_SCAN_MAX_OFFSET", "50000"))
+KEYSET_DEFAULT = os.environ.get("SUPABASE_SCAN_MODE", "concurrent") == "keyset"
+
+
+class Page(NamedTuple):
+    data: List[dict]
+    count: Optional[int]
+    cursor: Any = None
+
+
+def _select(client, table: str, columns: str, key: str, filters: Optional[Callable], count: Optional[str] = None):
+    query = client.table(table).select(columns, count=count)
+    if filters:
+        query = filters(query)
+    return query.order(key)
+
+
+def _fetch_offset(client, table, columns, key, filters, offset: int, page_size: int) -> List[dict]:
+    query = _select(client, table, columns, key, filters).range(offset, offset + page_size - 1)
+    return call(query.execute).data
+
+
+def _check_key(table: str, key: str, rows: List[dict]) -> None:
+    if rows and key not in rows[-1]:
+        raise ValueError(f"Scan of {table} must select its key column {key!r}")
+
+
+def iter_keyset_pages(
+    client,
+    table: str,
+    columns: str,
+    key: str = "id",
+    filters: Optional[Callable] = None,
+    page_size: int = PAGE_SIZE,
+    after: Any = None,
+    count: bool = True,
+) -> Iterator[Page]:
+    """
+    Yield the rows of `table` with key > `after` (all rows when None) as Pages
+    ordered by `key`, which must be unique and included in `columns`. With
+    `count`, the first request also asks for the exact matching row count and
+    every Page carries it.
+    """
+    total = None
+    first = True
+    while True:
+        query = _select(client, table, columns, key, filters, count="exact" if first and count else None)
+        if after is not None:
+            query = query.gt(key, after)
+        result = call(query.limit(page_size).execute)
+        if first:
+            total = result.count if count else None
+            first = False
+        rows = result.data
+        _check_key(table, key, rows)
+        if rows:
+            after = rows[-1][key]
+        yield Page(rows, total, after)
+        if len(rows) < page_size:
+            break
+
+
+def iter_pages(
+    client,
+    table: str,
+    columns: str,
+    key: str = "id",
+    filters: Optional[Callable] = None,
+    page_size: int = PAGE_SIZE,
+    workers: int = SCAN_WORKERS,
+    max_offset: int = MAX_OFFSET,
+    keyset: bool = KEYSET_DEFAULT,
+) -> Iterator[Page]:
+    """
+    Yield every row of `table` as Pages ordered by `key`, which must be unique
+    and included in `columns`. `filters` is applied to each query, e.g.
+    lambda q: q.eq("source", "expandi"). Every Page carries the row count
+    reported with the first page. With `keyset`, this is iter_keyset_pages().
+    """
+    if keyset:
+        yield from iter_keyset_pages(client, table, columns, key=key, filters=filters, page_size=page_size)
+        return
+
+    first = call(_select(client, table, columns, key, filters, count="exact").range(0, page_size - 1).execute)
+    total = first.count
+    _check_key(table, key, first.data)
+    last = first.data[-1] if first.data else None
+    yield Page(first.data, total, last[key] if last else None)
+    if len(first.data) < page_size:
+        return
+
+    # OFFSET pages up to max_offset, at most `workers` requests in flight
+    end = min(total if total is not None else 0, max_offset)
+    offsets = iter(range(page_size, end, page_size))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def submit(offset):
+            return pool.submit(_fetch_offset, client, table, columns, key, filters, offset, page_size)
+
+        pending = deque(submit(offset) for offset in islice(offsets, workers))
+        while pending:
+            rows = pending.popleft().result()
+            if rows:
+                last = rows[-1]
+                yield Page(rows, total, last[key])
+            if len(rows) < page_size:
+                for future in pending:
+                    future.cancel()
+                return
+            next_offset = next(offsets, None)
+            if next_offset is not None:
+                pending.append(submit(next_offset))
+
+    # Keyset tail
+    for page in iter_keyset_pages(
+        client, table, columns, key=key, filters=filters, page_size=page_size, after=last[key], count=False
+    ):
+        if page.data:
+            yield page._replace(count=total)
+
+
+def iter_rows(client, table: str, columns: str, **kwargs) -> Iterator[dict]:
+    """Yield the rows of iter_pages() one at a time."""
+    for page in iter_pages(client, table, columns, **kwargs):
+        yield from page.data
@@ -0,0 +1,93 @@
+"""
+Drain the candidate sync outbox (migrations/11_candidate_sync_outbox.sql).
+
+Triggers on expandi_network and the textkernel_* tables queue the ids of
+changed rows; this worker calls drain_candidate_sync_outbox() batch by batch
+until both sources are empty, so candidates stays current after a CSV import
+or a Colab insert with work proportional to what changed.
+
+Usage:
+    python sync_candidates_worker.py                  # drain once and exit
+    python sync_candidates_worker.py --watch 60       # keep polling every 60s
+    python sync_candidates_worker.py --source expandi --batch-size 1000
+
+Ids are only claimed once they have been quiet for --min-age seconds, so a
+resume is not synced while the loader is still writing its child rows.
+
+Settings (environment):
+    CANDIDATE_SYNC_BATCH_SIZE   ids per drain call, default 500
+    CANDIDATE_SYNC_MIN_AGE      seconds, default 60
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+
+from supabase_io.client import call, get_client
+
+SOURCES = ["expandi", "textkernel"]
+BATCH_SIZE = int(os.environ.get("CANDIDATE_SYNC_BATCH_SIZE", "500"))
+MIN_AGE = int(os.environ.get("CANDIDATE_SYNC_MIN_AGE", "60"))
+MAX_ATTEMPTS = 5
+
+
+def drain_batch(client, source: str, batch_size: int, max_attempts: int, min_age: int) -> Counter:
+    """Sync one batch of queued ids of `source`. Returns outcome counts."""
+    response = call(lambda: client.rpc("drain_candidate_sync_outbox", {
+        "p_source": source,
+        "p_limit": batch_size,
+        "p_max_attempts": max_attempts,
+        "p_min_age_seconds": min_age,
+    }).execute())
+    return Counter({row["action"]: row["row_count"] for row in response.data or []})
+
+
+def drain(
+    client,
+    source: str,
+    batch_size: int = BATCH_SIZE,
+    max_attempts: int = MAX_ATTEMPTS,
+    min_age: int = MIN_AGE,
+) -> Counter:
+    """
+    Drain `source` until a batch comes back empty. Failed ids are requeued
+    with a retry delay, so they are not claimed again within the same run.
+    Returns the totals.
+    """
+    totals = Counter()
+    while True:
+        outcome = drain_batch(client, source, batch_size, max_attempts, min_age)
+        if not outcome:
+            return totals
+        totals.update(outcome)
+        print(f"  [{source}] {sum(outcome.values())} ids: {dict(outcome)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync queued expandi / textkernel changes into candidates.")
+    parser.add_argument("--source", choices=SOURCES, action="append", help="Source to drain (default: all)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help="Skip ids that failed this many times")
+    parser.add_argument("--min-age", type=int, default=MIN_AGE, metavar="SECONDS",
+                        help="Only sync ids that have not changed for SECONDS")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Keep running, polling the outbox every SECONDS")
+    args = parser.parse_args()
+
+    client = get_client()
+    sources = args.source or SOURCES
+
+    while True:
+        for source in sources:
+            totals = drain(client, source, args.batch_size, args.max_attempts, args.min_age)
+            if totals:
+                print(f"{source}: {dict(totals)}")
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The scripts import their packages (contact_import, supabase_io, ...) as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,147 @@
+"""
+In-memory stand-in for the supabase-py / PostgREST query builder, covering
+what supabase_io.scan uses (select(count=), eq, gt, or_, order, range,
+limit) and insert. Every executed read is logged so tests can check how a scan paged
+through the table. Inserts honour `unique` columns with a 23505 error, and
+queued `insert_errors` let a test fail the next insert before or after it
+commits, like a timeout that loses the response.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+
+class StubError(Exception):
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+
+class Result(NamedTuple):
+    data: List[dict]
+    count: Optional[int]
+
+
+def _matches(row: dict, column: str, op: str, value) -> bool:
+    if row.get(column) is None:
+        return False
+    if op == "eq":
+        return row[column] == value
+    if op == "gte":
+        return row[column] >= value
+    return row[column] > value
+
+
+class Query:
+    def __init__(self, client: "StubClient", table: str):
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.count = None
+        self.key = None
+        self.filters = []
+        self.offset = 0
+        self.limit_rows = None
+        self.rows_to_insert = None
+
+    def insert(self, rows: List[dict]) -> "Query":
+        self.rows_to_insert = rows
+        return self
+
+    def select(self, columns: str, count: Optional[str] = None) -> "Query":
+        if columns.strip() != "*":
+            self.columns = [c.strip() for c in columns.split(",")]
+        self.count = count
+        return self
+
+    def eq(self, column: str, value) -> "Query":
+        self.filters.append(("eq", column, value))
+        return self
+
+    def or_(self, conditions: str) -> "Query":
+        """Only column.op.value terms with op in gt / gte / eq, e.g. 'a.gte."x",b.eq.1'."""
+        terms = re.findall(r'(\w+)\.(gte|gt|eq)\.("[^"]*"|[^,]*)', conditions)
+        self.filters.append(("or", [(c, op, v.strip('"')) for c, op, v in terms], None))
+        return self
+
+    def gt(self, column: str, value) -> "Query":
+        self.filters.append(("gt", column, value))
+        return self
+
+    def order(self, column: str) -> "Query":
+        self.key = column
+        return self
+
+    def range(self, start: int, end: int) -> "Query":
+        self.offset, self.limit_rows = start, end - start + 1
+        return self
+
+    def limit(self, n: int) -> "Query":
+        self.limit_rows = n
+        return self
+
+    def execute(self) -> Result:
+        if self.rows_to_insert is not None:
+            return self.client.insert(self.table, self.rows_to_insert)
+        if self.client.max_delay:
+            time.sleep(random.uniform(0, self.client.max_delay))
+        rows = list(self.client.tables[self.table])
+        for op, column, value in self.filters:
+            if op == "or":
+                rows = [r for r in rows if any(_matches(r, *term) for term in column)]
+            else:
+                rows = [r for r in rows if _matches(r, column, op, value)]
+        if self.key:
+            rows.sort(key=lambda r: r[self.key])
+        total = len(rows) if self.count == "exact" else None
+        end = None if self.limit_rows is None else self.offset + self.limit_rows
+        page = rows[self.offset:end]
+        if self.columns:
+            page = [{c: r[c] for c in self.columns} for r in page]
+        with self.client.lock:
+            self.client.requests.append({
+                "offset": self.offset,
+                "gt": next((v for op, _, v in self.filters if op == "gt"), None),
+                "or": next((c for op, c, _ in self.filters if op == "or"), None),
+                "count": self.count,
+                "rows": len(page),
+            })
+        return Result(page, total)
+
+
+class StubClient:
+    """client.table(name) over in-memory lists of row dicts."""
+
+    def __init__(self, tables: dict, max_delay: float = 0.0, unique: Optional[dict] = None):
+        self.tables = tables
+        self.max_delay = max_delay
+        self.unique = unique or {}
+        self.requests: List[dict] = []
+        self.inserts: List[int] = []
+        # (error, committed) raised by the next inserts, in order
+        self.insert_errors: List[tuple] = []
+        self.lock = threading.Lock()
+
+    def insert(self, table: str, rows: List[dict]) -> Result:
+        with self.lock:
+            self.inserts.append(len(rows))
+            error, committed = self.insert_errors.pop(0) if self.insert_errors else (None, False)
+            if error is not None and not committed:
+                raise error
+            column = self.unique.get(table)
+            if column:
+                seen = {r[column] for r in self.tables.setdefault(table, [])}
+                for row in rows:
+                    if row[column] in seen:
+                        raise StubError(f"duplicate key value violates unique constraint ({column})", "23505")
+                    seen.add(row[column])
+            self.tables.setdefault(table, []).extend(dict(r) for r in rows)
+            if error is not None:
+                raise error
+            return Result(rows, None)
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
@@ -0,0 +1,58 @@
+from collections import Counter
+
+from contact_import.dedup import DedupIndex, deduplicate
+from contact_import.pipeline import write_batches
+from tests.postgrest_stub import StubError
+
+
+class FailingInsertClient:
+    """Accepts inserts except for rows whose profile_link is in `bad_links`."""
+
+    def __init__(self, bad_links):
+        self.bad_links = set(bad_links)
+        self.rows = []
+
+    def table(self, name):
+        return self
+
+    def insert(self, records):
+        self._records = records
+        return self
+
+    def execute(self):
+        if any(r["profile_link"] in self.bad_links for r in self._records):
+            raise StubError("invalid input syntax", "22P02")
+        self.rows += self._records
+
+
+def record(link, email):
+    return {"profile_link": link, "email": email}
+
+
+def test_failed_insert_releases_keys():
+    client = FailingInsertClient(bad_links={"in/a"})
+    index = DedupIndex("link_email")
+    stats = Counter()
+
+    first = [record("in/a", "x@example.com")]
+    write_batches(client, deduplicate(first, index, stats), stats, batch_size=1, index=index)
+    second = [record("in/b", "x@example.com")]
+    write_batches(client, deduplicate(second, index, stats), stats, batch_size=1, index=index)
+
+    assert stats["errors"] == 1
+    assert stats["email_match"] == 0
+    assert [r["profile_link"] for r in client.rows] == ["in/b"]
+
+
+def test_duplicates_within_a_batch_are_skipped():
+    client = FailingInsertClient(bad_links=())
+    index = DedupIndex("link_email")
+    stats = Counter()
+
+    records = [record("in/a", "x@example.com"), record("in/b", "X@example.com"), record("in/a", None)]
+    write_batches(client, deduplicate(records, index, stats), stats, batch_size=10, index=index)
+
+    assert [r["profile_link"] for r in client.rows] == ["in/a"]
+    assert stats["email_match"] == 1
+    assert stats["profile_link_match"] == 1
+    assert index.match(record("in/c", "x@example.com"))["reason"] == "email_match"
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from contact_import.index_store import WATERMARK_LAG, DedupIndexFile
+from tests.postgrest_stub import StubClient
+
+NOW = datetime.now(timezone.utc)
+OLD = NOW - timedelta(days=30)
+
+
+def stamp(at):
+    return at.isoformat()
+
+
+def row(id, link, at, email=None):
+    return {
+        "id": id, "profile_link": link, "object_urn": None, "email": email,
+        "first_name": None, "last_name": None, "job_title": None,
+        "created_at": stamp(at), "updated_at": None,
+    }
+
+
+@pytest.fixture
+def rows():
+    return [
+        row(1, "in/a", OLD, "a@example.com"),
+        row(2, "in/b", OLD + timedelta(hours=1)),
+        row(3, "in/a", OLD + timedelta(hours=2)),
+    ]
+
+
+def test_rebuild_and_reopen(tmp_path, rows):
+    path = tmp_path / "dedup.idx"
+
+    store = DedupIndexFile(path)
+    assert not store.exists
+    assert store.rebuild(StubClient({"expandi_network": rows})) == 3
+    store.close()
+
+    reopened = DedupIndexFile(path)
+    assert reopened.lookup("profile_link", "in/a") == 1
+    assert reopened.lookup("profile_link", "in/b") == 2
+    assert reopened.lookup("email", "a@example.com") == 1
+    assert reopened.lookup("profile_link", "in/c") is None
+    assert reopened.count("profile_link") == 2
+    reopened.close()
+
+
+def test_sidecar_round_trip(tmp_path, rows):
+    path = tmp_path / "dedup.idx"
+
+    store = DedupIndexFile(path)
+    store.rebuild(StubClient({"expandi_network": rows}))
+    store.close()
+
+    with open(path.with_name("dedup.idx.json")) as f:
+        meta = json.load(f)
+    assert meta["watermark"] == stamp(OLD + timedelta(hours=2))
+    assert meta["keys"]["profile_link"] == 2 and meta["keys"]["email"] == 1
+    reopened = DedupIndexFile(path)
+    assert reopened.watermark == meta["watermark"]
+    reopened.close()
+
+
+def test_refresh_reads_only_new_rows(tmp_path, rows):
+    client = StubClient({"expandi_network": rows})
+    store = DedupIndexFile(tmp_path / "dedup.idx")
+    store.refresh(client)
+
+    rows.append(row(4, "in/d", OLD + timedelta(days=1)))
+    # The row at the watermark (created_at >= watermark) is read again
+    assert store.refresh(client) == 2
+    assert store.lookup("profile_link", "in/d") == 4
+    assert store.lookup("profile_link", "in/a") == 1
+    assert store.refresh(client) == 1
+    assert store.watermark == stamp(OLD + timedelta(days=1))
+    store.close()
+
+
+def test_watermark_lags_behind_the_scan(tmp_path):
+    rows = [row(1, "in/a", NOW)]
+    client = StubClient({"expandi_network": rows})
+    store = DedupIndexFile(tmp_path / "dedup.idx")
+    store.rebuild(client)
+
+    assert datetime.fromisoformat(store.watermark) <= NOW - WATERMARK_LAG + timedelta(seconds=5)
+
+    # Committed after the scan, stamped earlier than the newest row seen
+    rows.append(row(2, "in/late", NOW - timedelta(seconds=30)))
+    store.refresh(client)
+    assert store.lookup("profile_link", "in/late") == 2
+    store.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "dedup.idx"
+    path.write_bytes(b"NOTANIDX" + bytes(64))
+
+    with pytest.raises(ValueError):
+        DedupIndexFile(path)
@@ -0,0 +1,86 @@
+import csv
+
+import pytest
+
+from contact_import.parallel import iter_parsed_files
+
+
+def parse_name(row, csv_path):
+    return row["name"]
+
+
+def write_csv(path, names):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["name"])
+        writer.writeheader()
+        for name in names:
+            writer.writerow({"name": name})
+
+
+def test_more_files_than_workers(tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"f{i}.csv"
+        write_csv(path, [f"{i}-a", f"{i}-b"])
+        files.append(path)
+
+    results = [(path, list(rows)) for path, _, rows in iter_parsed_files(files, parse_name, workers=2)]
+
+    assert [path for path, _ in results] == files
+    assert [rows for _, rows in results] == [[f"{i}-a", f"{i}-b"] for i in range(5)]
+
+
+def test_start_rows(tmp_path):
+    path = tmp_path / "f.csv"
+    write_csv(path, ["a", "b", "c"])
+
+    results = [
+        (p, start, list(rows))
+        for p, start, rows in iter_parsed_files([path], parse_name, workers=2, start_rows={path: 2})
+    ]
+
+    assert results == [(path, 2, ["c"])]
+
+
+def parse_or_fail(row, csv_path):
+    if row["name"] == "bad":
+        raise ValueError("cannot parse")
+    return row["name"]
+
+
+def test_files_stream_in_chunks(tmp_path):
+    files = []
+    for i in range(3):
+        path = tmp_path / f"f{i}.csv"
+        write_csv(path, [f"{i}-{n}" for n in range(25)])
+        files.append(path)
+
+    scan = iter_parsed_files(files, parse_name, workers=2, chunk_size=3, max_chunks=2)
+    first_path, _, first = next(scan)
+    head = [next(first) for _ in range(4)]
+    rest = [(path, list(rows)) for path, _, rows in scan]
+
+    assert first_path == files[0] and head == [f"0-{n}" for n in range(4)]
+    assert rest == [(files[i], [f"{i}-{n}" for n in range(25)]) for i in (1, 2)]
+
+
+def test_worker_errors_reach_the_consumer(tmp_path):
+    path = tmp_path / "f.csv"
+    write_csv(path, ["a", "bad", "c"])
+
+    with pytest.raises(ValueError):
+        for _, _, rows in iter_parsed_files([path], parse_or_fail, workers=1, chunk_size=1):
+            list(rows)
+
+
+def test_consumer_can_stop_early(tmp_path):
+    files = []
+    for i in range(3):
+        path = tmp_path / f"f{i}.csv"
+        write_csv(path, [str(n) for n in range(50)])
+        files.append(path)
+
+    scan = iter_parsed_files(files, parse_name, workers=2, chunk_size=2, max_chunks=1)
+    _, _, rows = next(scan)
+    assert next(rows) == "0"
+    scan.close()
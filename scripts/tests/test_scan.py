@@ -0,0 +1,96 @@
+import pytest
+
+from supabase_io.scan import iter_keyset_pages, iter_pages, iter_rows
+from tests.postgrest_stub import StubClient
+
+
+def make_rows(n, start=1):
+    return [{"id": i, "source": "expandi" if i % 2 else "textkernel"} for i in range(start, start + n)]
+
+
+def ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_offset_pages_hand_over_to_keyset_at_max_offset():
+    client = StubClient({"t": make_rows(23)})
+
+    pages = list(iter_pages(client, "t", "id", page_size=5, workers=2, max_offset=10))
+
+    assert ids(r for p in pages for r in p.data) == list(range(1, 24))
+    assert all(p.count == 23 for p in pages)
+    offset_requests = [r for r in client.requests if r["gt"] is None]
+    keyset_requests = [r for r in client.requests if r["gt"] is not None]
+    assert sorted(r["offset"] for r in offset_requests) == [0, 5]
+    assert [r["gt"] for r in keyset_requests] == [10, 15, 20]
+    assert all(r["offset"] == 0 for r in keyset_requests)
+
+
+def test_keyset_tail_picks_up_rows_added_after_the_count():
+    rows = make_rows(12)
+    client = StubClient({"t": rows})
+    scan = iter_pages(client, "t", "id", page_size=5, workers=1, max_offset=5)
+
+    first = next(scan)
+    rows += make_rows(4, start=13)
+    rest = list(scan)
+
+    assert first.count == 12
+    assert ids(first.data + [r for p in rest for r in p.data]) == list(range(1, 17))
+
+
+def test_empty_table():
+    client = StubClient({"t": []})
+
+    pages = list(iter_pages(client, "t", "id", page_size=5))
+
+    assert pages == [pages[0]]
+    assert pages[0].data == [] and pages[0].count == 0 and pages[0].cursor is None
+    assert list(iter_keyset_pages(client, "t", "id", page_size=5))[0].data == []
+
+
+def test_no_empty_pages_when_rows_fill_the_last_page():
+    client = StubClient({"t": make_rows(20)})
+
+    pages = list(iter_pages(client, "t", "id", page_size=5, workers=3, max_offset=10))
+
+    assert [len(p.data) for p in pages] == [5, 5, 5, 5]
+
+
+def test_concurrent_pages_are_yielded_in_key_order():
+    rows = make_rows(200)
+    rows.reverse()
+    client = StubClient({"t": rows}, max_delay=0.005)
+
+    scanned = list(iter_rows(client, "t", "id", page_size=7, workers=4, max_offset=1000))
+
+    assert ids(scanned) == list(range(1, 201))
+
+
+def test_filters_apply_to_every_page():
+    client = StubClient({"t": make_rows(30)})
+
+    scanned = list(iter_rows(
+        client, "t", "id, source", filters=lambda q: q.eq("source", "expandi"),
+        page_size=4, workers=2, max_offset=8,
+    ))
+
+    assert ids(scanned) == list(range(1, 31, 2))
+
+
+def test_keyset_resume_from_cursor():
+    client = StubClient({"t": make_rows(12)})
+
+    first = next(iter_keyset_pages(client, "t", "id", page_size=5))
+    resumed = list(iter_keyset_pages(client, "t", "id", page_size=5, after=first.cursor, count=False))
+
+    assert first.cursor == 5
+    assert ids(r for p in resumed for r in p.data) == list(range(6, 13))
+    assert all(p.count is None for p in resumed)
+
+
+def test_scan_requires_the_key_column():
+    client = StubClient({"t": [{"id": 1, "name": "a"}]})
+
+    with pytest.raises(ValueError):
+        list(iter_keyset_pages(client, "t", "name", key="id"))
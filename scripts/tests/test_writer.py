@@ -0,0 +1,85 @@
+import csv
+from collections import Counter
+
+import load_expandi_csv_to_supabase as loader
+from contact_import.pipeline import write_batches
+from contact_import.writer import insert_records
+from supabase_io.client import DeadLetterFile
+from tests.postgrest_stub import StubClient, StubError
+
+
+def records(n):
+    return [{"profile_link": f"in/{i}", "email": None} for i in range(n)]
+
+
+def links(rows):
+    return [r["profile_link"] for r in rows]
+
+
+def test_committed_timeout_is_not_resent():
+    client = StubClient({"expandi_network": []}, unique={"expandi_network": "profile_link"})
+    client.insert_errors.append((StubError("Gateway Timeout", "504"), True))
+
+    failures = insert_records(client, records(8))
+
+    assert client.inserts == [8]
+    assert len(failures) == 8
+    assert links(client.tables["expandi_network"]) == links(records(8))
+
+
+def test_row_errors_are_isolated():
+    client = StubClient({"expandi_network": [{"profile_link": "in/5"}]}, unique={"expandi_network": "profile_link"})
+
+    failures = insert_records(client, records(8))
+
+    assert [(r["profile_link"], e.code) for r, e in failures] == [("in/5", "23505")]
+    assert sorted(links(client.tables["expandi_network"])) == sorted(links(records(8)))
+
+
+def test_pipeline_dead_letters_a_batch_that_may_have_committed(tmp_path):
+    client = StubClient({"expandi_network": []}, unique={"expandi_network": "profile_link"})
+    client.insert_errors.append((TimeoutError("read timed out"), True))
+    dead_letter = DeadLetterFile(tmp_path / "dead_letter.jsonl")
+    stats = Counter()
+
+    write_batches(client, records(6), stats, batch_size=3, dead_letter=dead_letter)
+
+    assert stats["inserted"] == 3 and stats["errors"] == 3
+    assert stats["profile_link_match"] == 0
+    assert dead_letter.count == 3
+    assert links(client.tables["expandi_network"]) == links(records(6))
+
+
+def test_campaign_events_not_duplicated_after_timeout(tmp_path, monkeypatch):
+    csv_path = tmp_path / "search.csv"
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "profile_link"])
+        writer.writeheader()
+        writer.writerows({"id": i, "profile_link": f"in/{i}"} for i in range(10))
+
+    client = StubClient({"expandi_campaign_events": []})
+    client.insert_errors.append((StubError("Gateway Timeout", "504"), True))
+    monkeypatch.setattr(loader, "get_client", lambda: client)
+    monkeypatch.setattr(loader, "BATCH_SIZE", 4)
+    monkeypatch.setattr(loader, "PROGRESS_FILE", tmp_path / "progress.json")
+    monkeypatch.setattr(loader, "dead_letter", DeadLetterFile(tmp_path / "dead_letter.jsonl"))
+    progress = {}
+
+    loader.load_csv_to_supabase(csv_path, progress)
+
+    inserted = links(client.tables["expandi_campaign_events"])
+    assert sorted(inserted) == sorted(f"in/{i}" for i in range(10))
+    assert len(inserted) == len(set(inserted))
+    assert loader.dead_letter.count == 4
+    assert progress["search.csv"] == 10
+
+
+def test_campaign_events_rejected_row_is_dead_lettered(tmp_path, monkeypatch):
+    client = StubClient({"expandi_campaign_events": []})
+    client.insert_errors += [(StubError("invalid input syntax", "22P02"), False)] * 4
+    monkeypatch.setattr(loader, "get_client", lambda: client)
+
+    committed, error = loader.insert_batch(records(4))
+
+    assert (committed, error.code) == (0, "22P02")
+    assert client.inserts == [4, 2, 1]
@@ -0,0 +1,101 @@
+"""
+Content-addressed cache of Textkernel parser output.
+
+Each CV is keyed by the SHA-256 of its bytes. The raw parser response is
+stored gzip-compressed under objects/<hash[:2]>/<hash>.json.gz, and
+index.json maps every hash to the file names it was seen under, the
+textkernel_resumes.id it was loaded as (once known) and the credits the
+parse cost (Info.TransactionCost).
+
+index.json also keeps a (size, mtime) -> hash entry per file path, so an
+unchanged file is not even re-read on the next run. A renamed or copied file
+with the same bytes still hits the cache through its hash.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, cache_dir: Path):
+        self.dir = Path(cache_dir)
+        self.index_path = self.dir / "index.json"
+        self.entries: Dict[str, dict] = {}
+        self.files: Dict[str, dict] = {}
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            self.entries = index.get("entries", {})
+            self.files = index.get("files", {})
+
+    def save(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"entries": self.entries, "files": self.files}, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.dir / "objects" / content_hash[:2] / f"{content_hash}.json.gz"
+
+    def hash_file(self, path: Path) -> str:
+        """Content hash of `path`, reusing the stored hash while size and mtime are unchanged."""
+        stat = path.stat()
+        key = str(path.resolve())
+        known = self.files.get(key)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime:
+            return known["hash"]
+        content_hash = file_sha256(path)
+        self.files[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": content_hash}
+        return content_hash
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the cached parser response, or None."""
+        if content_hash not in self.entries:
+            return None
+        object_path = self._object_path(content_hash)
+        if not object_path.exists():
+            return None
+        with gzip.open(object_path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, content_hash: str, file_name: str, response: Dict[str, Any]) -> None:
+        object_path = self._object_path(content_hash)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = object_path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(response, f, ensure_ascii=False)
+        os.replace(tmp, object_path)
+
+        entry = self.entries.setdefault(content_hash, {"file_names": [], "resume_id": None})
+        entry["parsed_at"] = datetime.now(timezone.utc).isoformat()
+        entry["transaction_cost"] = (response.get("Info") or {}).get("TransactionCost")
+        self.add_file_name(content_hash, file_name)
+
+    def add_file_name(self, content_hash: str, file_name: str) -> None:
+        entry = self.entries.get(content_hash)
+        if entry is not None and file_name not in entry["file_names"]:
+            entry["file_names"].append(file_name)
+
+    def link(self, content_hash: str, resume_id: str) -> None:
+        """Record the textkernel_resumes.id the parse was loaded as."""
+        self.entries[content_hash]["resume_id"] = resume_id
+
+    def resume_id(self, content_hash: str) -> Optional[str]:
+        entry = self.entries.get(content_hash)
+        return entry["resume_id"] if entry else None
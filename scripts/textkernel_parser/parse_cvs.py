@@ -0,0 +1,181 @@
+"""
+Parse a folder of CVs with the Textkernel resume parser, reusing cached output.
+
+Every file is hashed (see parse_cache.py). Files whose content is already in
+the cache are not sent to Textkernel again; only new or changed files are
+parsed and cost credits. The parser response for every CV, cached or fresh,
+is written to the output directory as <relative path>.json.
+
+DocumentLastModified is taken from data/cv_metadata/cv_metadata_report.csv
+(modified_at, matched by file name) when the file is listed there, otherwise
+from the file's mtime.
+
+--link-resumes maps cached hashes to textkernel_resumes.id by file name, so
+a later run can tell which CVs are already loaded in Supabase.
+
+Environment:
+    TEXTKERNEL_ACCOUNT_ID, TEXTKERNEL_SERVICE_KEY
+    TEXTKERNEL_PARSER_URL  default https://api.eu.textkernel.com/tx/v10/parser/resume
+
+Usage:
+    python parse_cvs.py <cv_dir> [--out DIR] [--cache DIR] [--dry-run] [--link-resumes]
+"""
+
+import argparse
+import base64
+import csv
+import json
+import os
+import sys
+import urllib.request
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from parse_cache import ParseCache
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_DIR = SCRIPT_DIR.parents[1]
+DEFAULT_CACHE_DIR = SCRIPT_DIR / ".parse_cache"
+DEFAULT_OUT_DIR = SCRIPT_DIR / "parsed"
+DEFAULT_METADATA = REPO_DIR / "data" / "cv_metadata" / "cv_metadata_report.csv"
+
+PARSER_URL = os.environ.get("TEXTKERNEL_PARSER_URL", "https://api.eu.textkernel.com/tx/v10/parser/resume")
+CV_EXTENSIONS = {".pdf", ".doc", ".docx"}
+SAVE_EVERY = 25
+
+
+def load_modified_dates(metadata_csv: Path) -> Dict[str, str]:
+    """file name -> modified_at as YYYY-MM-DD, from the Drive metadata report."""
+    if not metadata_csv.exists():
+        return {}
+    dates = {}
+    with open(metadata_csv, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                modified = datetime.strptime(row["modified_at"], "%m/%d/%Y %H:%M:%S")
+            except (KeyError, TypeError, ValueError):
+                continue
+            dates[row["filename"]] = modified.date().isoformat()
+    return dates
+
+
+def parse_with_textkernel(path: Path, last_modified: str) -> dict:
+    body = json.dumps({
+        "DocumentAsBase64String": base64.b64encode(path.read_bytes()).decode("ascii"),
+        "DocumentLastModified": last_modified,
+    }).encode("utf-8")
+    request = urllib.request.Request(
+        PARSER_URL,
+        data=body,
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Tx-AccountId": os.environ["TEXTKERNEL_ACCOUNT_ID"],
+            "Tx-ServiceKey": os.environ["TEXTKERNEL_SERVICE_KEY"],
+        },
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.load(response)
+
+
+def transaction_cost(response: dict) -> float:
+    cost = (response.get("Info") or {}).get("TransactionCost")
+    return cost if isinstance(cost, (int, float)) else 0
+
+
+def link_resumes(cache: ParseCache) -> int:
+    """Link unlinked cache entries to textkernel_resumes rows with the same file_name."""
+    sys.path.insert(0, str(SCRIPT_DIR.parent))
+    from supabase_io.client import get_client
+    from supabase_io.scan import iter_rows
+
+    resume_ids = {row["file_name"]: row["id"] for row in iter_rows(get_client(), "textkernel_resumes", "id, file_name")}
+    linked = 0
+    for content_hash, entry in cache.entries.items():
+        if entry.get("resume_id"):
+            continue
+        for file_name in entry["file_names"]:
+            if file_name in resume_ids:
+                cache.link(content_hash, resume_ids[file_name])
+                linked += 1
+                break
+    return linked
+
+
+def write_output(out_dir: Path, relative: Path, response: dict) -> None:
+    out_path = out_dir / f"{relative.as_posix()}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(response, f, ensure_ascii=False, indent=2)
+
+
+def run(cv_dir: Path, out_dir: Path, cache_dir: Path, metadata_csv: Path, dry_run: bool = False) -> Counter:
+    cache = ParseCache(cache_dir)
+    modified_dates = load_modified_dates(metadata_csv)
+    files = sorted(p for p in cv_dir.rglob("*") if p.is_file() and p.suffix.lower() in CV_EXTENSIONS)
+    print(f"Found {len(files)} CV files in {cv_dir}")
+
+    stats = Counter()
+    credits = Counter()
+    for i, path in enumerate(files, 1):
+        content_hash = cache.hash_file(path)
+        response: Optional[dict] = cache.get(content_hash)
+
+        if response is not None:
+            stats["cached"] += 1
+            credits["saved"] += transaction_cost(response)
+            cache.add_file_name(content_hash, path.name)
+        elif dry_run:
+            stats["to_parse"] += 1
+            continue
+        else:
+            last_modified = modified_dates.get(path.name) or date.fromtimestamp(path.stat().st_mtime).isoformat()
+            try:
+                response = parse_with_textkernel(path, last_modified)
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"  Error parsing {path.name}: {e}")
+                continue
+            cache.put(content_hash, path.name, response)
+            stats["parsed"] += 1
+            credits["spent"] += transaction_cost(response)
+
+        write_output(out_dir, path.relative_to(cv_dir), response)
+        if i % SAVE_EVERY == 0:
+            cache.save()
+            print(f"  {i}/{len(files)} (parsed: {stats['parsed']}, cached: {stats['cached']})")
+
+    cache.save()
+    print(f"\nParsed: {stats['parsed']} ({credits['spent']:.2f} credits)")
+    print(f"From cache: {stats['cached']} ({credits['saved']:.2f} credits saved)")
+    if dry_run:
+        print(f"Would parse: {stats['to_parse']}")
+    if stats["errors"]:
+        print(f"Errors: {stats['errors']} (retried on the next run)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse CVs with Textkernel, skipping unchanged files.")
+    parser.add_argument("cv_dir", type=Path)
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT_DIR)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--metadata", type=Path, default=DEFAULT_METADATA)
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many files would be parsed")
+    parser.add_argument("--link-resumes", action="store_true", help="Map cache entries to textkernel_resumes.id")
+    args = parser.parse_args()
+
+    run(args.cv_dir, args.out, args.cache, args.metadata, args.dry_run)
+
+    if args.link_resumes:
+        cache = ParseCache(args.cache)
+        linked = link_resumes(cache)
+        cache.save()
+        print(f"Linked {linked} cache entries to textkernel_resumes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Incremental JSON event parser.
+
+iter_events() reads a file in fixed-size chunks and yields one
+(path, event, value) tuple per JSON token without building the document:
+
+    ("Value.ResumeData", "start_map", None)
+    ("Value.ResumeData", "map_key", "ContactInformation")
+    ("Value.ResumeData.Skills.Raw[]", "start_map", None)
+    ("Info.Code", "string", "Success")
+
+Paths use the same notation as collect_paths() in validate_textkernel_schema.py:
+object keys joined with ".", array items as "[]". Scalar events are "string",
+"number", "boolean" and "null"; containers emit start_map / end_map and
+start_array / end_array. Memory use is bounded by the chunk size and the
+nesting depth (plus the longest single string), not the document size.
+
+Strings are decoded with the C scanner json uses, so only the structure is
+walked in Python.
+"""
+
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+from typing import IO, Any, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+NUMBER_CHARS = set("0123456789.eE+-")
+LITERALS = {"true": True, "false": False, "null": None}
+
+Event = Tuple[str, str, Any]
+
+
+class _Tokenizer:
+    def __init__(self, f: IO[str], chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message: str):
+        return JSONDecodeError(message, self.buf, self.pos)
+
+    def next(self) -> Tuple[str, Any]:
+        """Return (kind, value); kind is a punctuation char, "string", "number", "literal" or "eof"."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf):
+                if self._more():
+                    continue
+                return "eof", None
+
+            c = self.buf[self.pos]
+            if c in "{}[]:,":
+                self.pos += 1
+                return c, None
+
+            if c == '"':
+                try:
+                    value, end = scanstring(self.buf, self.pos + 1, True)
+                except JSONDecodeError:
+                    # Possibly cut off at the chunk boundary
+                    if not self.eof and self._more():
+                        continue
+                    raise
+                self.pos = end
+                return "string", value
+
+            if c == "-" or c.isdigit():
+                m = NUMBER.match(self.buf, self.pos)
+                if m is None:
+                    if not self.eof and self._more():
+                        continue
+                    raise self._error("Invalid number")
+                end = m.end()
+                if (end == len(self.buf) or self.buf[end] in NUMBER_CHARS) and not self.eof and self._more():
+                    # The number may continue in the next chunk
+                    continue
+                self.pos = m.end()
+                text = m.group()
+                return "number", float(text) if m.group(1) or m.group(2) else int(text)
+
+            for literal, value in LITERALS.items():
+                if self.buf.startswith(literal, self.pos):
+                    self.pos += len(literal)
+                    return "literal", value
+            if len(self.buf) - self.pos < 5 and not self.eof and self._more():
+                continue
+            raise self._error(f"Unexpected character {c!r}")
+
+
+def _scalar_event(kind: str, value: Any) -> str:
+    if kind == "string":
+        return "string"
+    if kind == "number":
+        return "number"
+    return "null" if value is None else "boolean"
+
+
+def _value(tokens: _Tokenizer, token: Tuple[str, Any], path: str) -> Iterator[Event]:
+    kind, value = token
+    if kind == "{":
+        yield path, "start_map", None
+        token = tokens.next()
+        if token[0] != "}":
+            while True:
+                if token[0] != "string":
+                    raise tokens._error("Expecting property name enclosed in double quotes")
+                key = token[1]
+                yield path, "map_key", key
+                if tokens.next()[0] != ":":
+                    raise tokens._error("Expecting ':' delimiter")
+                yield from _value(tokens, tokens.next(), f"{path}.{key}" if path else key)
+                token = tokens.next()
+                if token[0] == "}":
+                    break
+                if token[0] != ",":
+                    raise tokens._error("Expecting ',' delimiter")
+                token = tokens.next()
+        yield path, "end_map", None
+    elif kind == "[":
+        yield path, "start_array", None
+        item_path = f"{path}[]"
+        token = tokens.next()
+        if token[0] != "]":
+            while True:
+                yield from _value(tokens, token, item_path)
+                token = tokens.next()
+                if token[0] == "]":
+                    break
+                if token[0] != ",":
+                    raise tokens._error("Expecting ',' delimiter")
+                token = tokens.next()
+        yield path, "end_array", None
+    elif kind in ("string", "number", "literal"):
+        yield path, _scalar_event(kind, value), value
+    else:
+        raise tokens._error("Expecting value")
+
+
+def iter_events(f: IO[str], chunk_size: Optional[int] = None) -> Iterator[Event]:
+    """Yield (path, event, value) for the single JSON document in f."""
+    tokens = _Tokenizer(f, chunk_size or CHUNK_SIZE)
+    yield from _value(tokens, tokens.next(), "")
+    if tokens.next()[0] != "eof":
+        raise tokens._error("Extra data")
@@ -0,0 +1,265 @@
+"""
+Merged schema inference over Textkernel responses.
+
+Every value of every document is folded into one SchemaNode tree: all array
+items share the array's "items" node and all documents share the root, so a
+field that appears only in the fifth Position of the hundredth resume still
+shows up. Each node records how often it occurred, the count per JSON type
+(nullability is a "null" count) and, for objects, the keys seen.
+
+to_json_schema() emits draft-07 JSON Schema in the layout of
+comparing_textkernel_gemini/textkernel_schema.json, rooted at
+Value.ResumeData by default. Keys present in every occurrence of their parent
+object are listed as "required". With annotations, every node also carries
+"x-occurrences" and "x-type-counts".
+
+Usage:
+    python schema_merge.py <directory | "glob/**/*.json"> [--out schema.json]
+        [--root Value.ResumeData] [--workers N] [--stream] [--no-annotations]
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from json_stream import iter_events
+
+# Order in which types are listed in emitted schemas
+TYPE_ORDER = ["object", "array", "string", "integer", "number", "boolean", "null"]
+
+SCALAR_EVENT_TYPES = {"string": "string", "boolean": "boolean", "null": "null"}
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+class SchemaNode:
+    __slots__ = ("count", "types", "properties", "items")
+
+    def __init__(self):
+        self.count = 0
+        self.types: Dict[str, int] = {}
+        self.properties: Dict[str, "SchemaNode"] = {}
+        self.items: Optional["SchemaNode"] = None
+
+    def __getstate__(self):
+        return self.count, self.types, self.properties, self.items
+
+    def __setstate__(self, state):
+        self.count, self.types, self.properties, self.items = state
+
+    def _seen(self, type_name: str) -> None:
+        self.count += 1
+        self.types[type_name] = self.types.get(type_name, 0) + 1
+
+    def child(self, key: str) -> "SchemaNode":
+        node = self.properties.get(key)
+        if node is None:
+            node = self.properties[key] = SchemaNode()
+        return node
+
+    def item_node(self) -> "SchemaNode":
+        if self.items is None:
+            self.items = SchemaNode()
+        return self.items
+
+    def add(self, value: Any) -> None:
+        """Fold a loaded JSON value into this node."""
+        if isinstance(value, dict):
+            self._seen("object")
+            for key, child_value in value.items():
+                self.child(key).add(child_value)
+        elif isinstance(value, list):
+            self._seen("array")
+            if value:
+                items = self.item_node()
+                for item in value:
+                    items.add(item)
+        else:
+            self._seen(_type_name(value))
+
+    def add_events(self, events: Iterable[Tuple[str, str, Any]]) -> None:
+        """Fold one document given as json_stream events into this node."""
+        # Stack of [node, is_object, pending key]
+        stack: List[list] = []
+        for _, event, value in events:
+            if event == "map_key":
+                stack[-1][2] = value
+                continue
+            if event in ("end_map", "end_array"):
+                stack.pop()
+                continue
+
+            if not stack:
+                node = self
+            elif stack[-1][1]:
+                node = stack[-1][0].child(stack[-1][2])
+            else:
+                node = stack[-1][0].item_node()
+
+            if event == "start_map":
+                node._seen("object")
+                stack.append([node, True, None])
+            elif event == "start_array":
+                node._seen("array")
+                stack.append([node, False, None])
+            elif event == "number":
+                node._seen(_type_name(value))
+            else:
+                node._seen(SCALAR_EVENT_TYPES[event])
+
+    def merge(self, other: "SchemaNode") -> None:
+        self.count += other.count
+        for type_name, n in other.types.items():
+            self.types[type_name] = self.types.get(type_name, 0) + n
+        for key, node in other.properties.items():
+            self.child(key).merge(node)
+        if other.items is not None:
+            self.item_node().merge(other.items)
+
+    def find(self, path: str) -> Optional["SchemaNode"]:
+        """Return the node at a dotted path ("" for this node)."""
+        node = self
+        for part in path.split(".") if path else []:
+            node = node.properties.get(part)
+            if node is None:
+                return None
+        return node
+
+    def iter_paths(self, path: str = "") -> Iterable[Tuple[str, "SchemaNode"]]:
+        """Yield (path, node) for every node, in collect_paths() notation."""
+        if path:
+            yield path, self
+        for key, node in self.properties.items():
+            yield from node.iter_paths(f"{path}.{key}" if path else key)
+        if self.items is not None:
+            yield from self.items.iter_paths(f"{path}[]")
+
+    def to_json_schema(self, annotate: bool = True) -> Dict[str, Any]:
+        types = [t for t in TYPE_ORDER if t in self.types]
+        types += sorted(t for t in self.types if t not in TYPE_ORDER)
+        if "integer" in types and "number" in types:
+            types.remove("integer")
+
+        schema: Dict[str, Any] = {}
+        if types:
+            schema["type"] = types[0] if len(types) == 1 else types
+        if "object" in self.types:
+            objects = self.types["object"]
+            schema["properties"] = {key: node.to_json_schema(annotate) for key, node in self.properties.items()}
+            required = [key for key, node in self.properties.items() if node.count == objects]
+            if required:
+                schema["required"] = required
+        if "array" in self.types:
+            schema["items"] = self.items.to_json_schema(annotate) if self.items is not None else {}
+        if annotate:
+            schema["x-occurrences"] = self.count
+            schema["x-type-counts"] = dict(self.types)
+        return schema
+
+
+def schema_document(root: SchemaNode, root_path: str, documents: int, annotate: bool = True) -> Dict[str, Any]:
+    node = root.find(root_path)
+    if node is None:
+        raise ValueError(f"No document contains {root_path}")
+    return {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "$id": "textkernel-resume-parser-schema-inferred",
+        "title": "Textkernel/Sovren Resume Parser Output Schema (inferred)",
+        "description": f"Merged from {documents} documents, rooted at {root_path or 'the document root'}",
+        **node.to_json_schema(annotate),
+    }
+
+
+def merge_files(json_files: List[str], stream: bool = False) -> Tuple[SchemaNode, int, List[dict]]:
+    """Fold a list of files into one tree. Returns (tree, documents merged, errors)."""
+    root = SchemaNode()
+    documents = 0
+    errors = []
+    for json_file in json_files:
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                if stream:
+                    # Fold into a scratch tree so a parse error halfway leaves root untouched
+                    doc = SchemaNode()
+                    doc.add_events(iter_events(f))
+                    root.merge(doc)
+                else:
+                    root.add(json.load(f))
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            errors.append({"file": json_file, "error": f"{type(e).__name__}: {e}"})
+            continue
+        documents += 1
+    return root, documents, errors
+
+
+def merge_corpus(json_files: List[str], workers: Optional[int] = None, stream: bool = False):
+    """merge_files() split across a process pool, one slice of files per worker."""
+    workers = workers or 1
+    if workers == 1 or len(json_files) < 2:
+        return merge_files(json_files, stream)
+
+    slices = [json_files[i::workers] for i in range(workers)]
+    root = SchemaNode()
+    documents = 0
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for tree, n, slice_errors in pool.map(merge_files, slices, [stream] * len(slices)):
+            root.merge(tree)
+            documents += n
+            errors += slice_errors
+    return root, documents, errors
+
+
+def main():
+    from validate_textkernel_schema import find_json_files
+
+    parser = argparse.ArgumentParser(description="Infer a merged JSON Schema from Textkernel responses.")
+    parser.add_argument("target", help="JSON file, directory or glob")
+    parser.add_argument("--out", default="textkernel_schema_inferred.json")
+    parser.add_argument("--root", default="Value.ResumeData", help="Dotted path the schema is rooted at ('' for the whole document)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stream", action="store_true", help="Parse files incrementally")
+    parser.add_argument("--no-annotations", action="store_true", help="Omit x-occurrences / x-type-counts")
+    args = parser.parse_args()
+
+    files = find_json_files(args.target)
+    if not files:
+        print(f"No JSON files found for {args.target}")
+        sys.exit(1)
+
+    print(f"Merging schemas of {len(files)} files...")
+    root, documents, errors = merge_corpus(files, args.workers, args.stream)
+    for error in errors:
+        print(f"  [SKIPPED] {error['file']}: {error['error']}")
+
+    schema = schema_document(root, args.root, documents, annotate=not args.no_annotations)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=4, ensure_ascii=False)
+
+    nullable = sum(1 for _, node in root.iter_paths() if "null" in node.types)
+    conflicts = sum(1 for _, node in root.iter_paths() if len(set(node.types) - {"null"}) > 1)
+    print(f"  Documents: {documents}, skipped: {len(errors)}")
+    print(f"  Paths: {sum(1 for _ in root.iter_paths())}, nullable: {nullable}, type conflicts: {conflicts}")
+    print(f"  Schema written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,34 @@ schema information for analysis.
 Usage:
     python validate_textkernel_schema.py <json_file>
     python validate_textkernel_schema.py --extract-schema <json_file>
+    python validate_textkernel_schema.py <directory | "glob/**/*.json"> [--workers N] [--report PREFIX] [--stream]
+
+Given a directory or a glob, every matching file is validated and summarized
+in a process pool and an aggregated report is written:
+    PREFIX_files.csv   one row per file: parse errors, missing required paths, summary
+    PREFIX_fields.csv  per-field presence rate and observed types (type conflicts flagged)
+    PREFIX.json        the same aggregates plus summarize_resume statistics
+A file that cannot be read or parsed is reported and does not stop the run.
+
+With --stream, bulk mode reads each file through json_stream.iter_events
+instead of json.load, so a worker never holds a whole document or its schema
+tree; only the required paths, the summarize_resume fields and the set of
+paths seen are kept.
 """
 
+import argparse
+import csv
+import glob
 import json
+import os
 import sys
-from typing import Any, Dict, List, Optional
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from json_stream import iter_events
+from schema_merge import SchemaNode
 
 
 def get_type_name(value: Any) -> str:
@@ -36,44 +59,22 @@ def get_type_name(value: Any) -> str:
 
 def extract_schema(obj: Any, path: str = "") -> Dict[str, Any]:
     """
-    Recursively extract schema from a JSON object.
-    Returns a schema-like structure describing the object.
+    Extract a schema from a JSON object. Every array item is merged into the
+    array's "items" schema (see schema_merge.SchemaNode); a path seen with
+    several types gets a list of types.
     """
-    if obj is None:
-        return {"type": "null"}
-    
-    elif isinstance(obj, bool):
-        return {"type": "boolean"}
-    
-    elif isinstance(obj, int):
-        return {"type": "integer"}
-    
-    elif isinstance(obj, float):
-        return {"type": "number"}
-    
-    elif isinstance(obj, str):
-        return {"type": "string"}
-    
-    elif isinstance(obj, list):
-        if len(obj) == 0:
-            return {"type": "array", "items": {}}
-        else:
-            # Sample first item for schema
-            return {
-                "type": "array",
-                "items": extract_schema(obj[0], f"{path}[0]")
-            }
-    
-    elif isinstance(obj, dict):
-        properties = {}
-        for key, value in obj.items():
-            properties[key] = extract_schema(value, f"{path}.{key}")
-        return {
-            "type": "object",
-            "properties": properties
-        }
-    
-    return {"type": "unknown"}
+    node = SchemaNode()
+    node.add(obj)
+    return node.to_json_schema(annotate=False)
+
+
+REQUIRED_FIELDS = [
+    ("Value", "Top-level Value object"),
+    ("Value.ResumeData", "Resume data container"),
+    ("Info", "API response info"),
+    ("Info.Code", "Response status code"),
+]
+REQUIRED_PATHS = [path for path, _ in REQUIRED_FIELDS]
 
 
 def validate_required_fields(data: Dict) -> List[str]:
@@ -81,16 +82,9 @@ def validate_required_fields(data: Dict) -> List[str]:
     Validate that required Textkernel fields are present.
     Returns a list of missing fields.
     """
-    required_paths = [
-        ("Value", "Top-level Value object"),
-        ("Value.ResumeData", "Resume data container"),
-        ("Info", "API response info"),
-        ("Info.Code", "Response status code"),
-    ]
-    
     missing = []
     
-    for path, description in required_paths:
+    for path, description in REQUIRED_FIELDS:
         parts = path.split(".")
         current = data
         found = True
@@ -167,19 +161,28 @@ def summarize_resume(data: Dict) -> Dict[str, Any]:
     return summary
 
 
+def schema_types(schema: Dict) -> set:
+    type_value = schema.get("type", [])
+    return set(type_value) if isinstance(type_value, list) else {type_value}
+
+
 def print_schema_tree(schema: Dict, indent: int = 0) -> None:
     """Print schema in a tree-like format."""
     prefix = "  " * indent
     
-    if schema.get("type") == "object":
+    if schema_types(schema) & {"object"}:
         for key, value in schema.get("properties", {}).items():
             type_str = value.get("type", "unknown")
+            if isinstance(type_str, list):
+                type_str = next((t for t in ("object", "array") if t in type_str), "|".join(type_str))
             if type_str == "object":
                 print(f"{prefix}{key}: {{")
                 print_schema_tree(value, indent + 1)
                 print(f"{prefix}}}")
             elif type_str == "array":
                 items_type = value.get("items", {}).get("type", "unknown")
+                if isinstance(items_type, list):
+                    items_type = "object" if "object" in items_type else "|".join(items_type)
                 if items_type == "object":
                     print(f"{prefix}{key}: [")
                     print_schema_tree(value.get("items", {}), indent + 1)
@@ -188,19 +191,321 @@ def print_schema_tree(schema: Dict, indent: int = 0) -> None:
                     print(f"{prefix}{key}: [{items_type}]")
             else:
                 print(f"{prefix}{key}: {type_str}")
-    elif schema.get("type") == "array":
+    elif schema_types(schema) & {"array"}:
         items = schema.get("items", {})
-        if items.get("type") == "object":
+        if schema_types(items) & {"object"}:
             print_schema_tree(items, indent)
 
 
+# summarize_resume fields reported as min / max / mean across files
+NUMERIC_SUMMARY_FIELDS = [
+    "credits_used",
+    "years_experience",
+    "education_count",
+    "positions_count",
+    "raw_skills_count",
+    "normalized_skills_count",
+    "certifications_count",
+]
+
+
+def collect_paths(obj: Any, path: str = "", paths: Optional[Dict[str, set]] = None) -> Dict[str, set]:
+    """
+    Map every path in obj to the set of types seen there. Array items are
+    all visited and share the path "<array>[]".
+    """
+    if paths is None:
+        paths = {}
+    if path:
+        paths.setdefault(path, set()).add(get_type_name(obj))
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            collect_paths(value, f"{path}.{key}" if path else key, paths)
+    elif isinstance(obj, list):
+        for item in obj:
+            collect_paths(item, f"{path}[]", paths)
+    return paths
+
+
+def has_path(data: Dict, path: str) -> bool:
+    current = data
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return False
+        current = current[part]
+    return True
+
+
+def profile_file(json_file: str) -> Dict[str, Any]:
+    """Validate and summarize one file. Errors are returned, not raised."""
+    result = {"file": json_file, "ok": False, "error": None, "missing": [], "summary": {}, "paths": {}}
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    if not isinstance(data, dict):
+        result["error"] = f"Top-level JSON is {get_type_name(data)}, expected object"
+        return result
+
+    try:
+        result["missing"] = [path for path in REQUIRED_PATHS if not has_path(data, path)]
+        result["summary"] = summarize_resume(data)
+        result["paths"] = {path: sorted(types) for path, types in collect_paths(data).items()}
+    except (AttributeError, TypeError, ValueError) as e:
+        # summarize_resume assumes the documented shape, e.g. objects where it calls .get()
+        result.update(missing=[], summary={}, paths={}, error=f"Unexpected structure: {type(e).__name__}: {e}")
+        return result
+    result["ok"] = True
+    return result
+
+
+# Paths read by summarize_resume, in collect_paths() / json_stream notation
+RESUME = "Value.ResumeData."
+CONTACT = RESUME + "ContactInformation."
+STREAM_SCALARS = {
+    "Info.Code": "status",
+    "Info.Message": "message",
+    "Info.TransactionCost": "credits_used",
+    CONTACT + "CandidateName.FormattedName": "name",
+    RESUME + "Education.HighestDegree.Name.Normalized": "highest_degree",
+    RESUME + "EmploymentHistory.ExperienceSummary.MonthsOfWorkExperience": "years_experience",
+}
+STREAM_COUNTS = {
+    RESUME + "Education.EducationDetails[]": "education_count",
+    RESUME + "EmploymentHistory.Positions[]": "positions_count",
+    RESUME + "Skills.Raw[]": "raw_skills_count",
+    RESUME + "Skills.Normalized[]": "normalized_skills_count",
+    RESUME + "Certifications[]": "certifications_count",
+}
+# list item path -> (summary key, item field or None for the item itself)
+STREAM_LISTS = {
+    CONTACT + "EmailAddresses[]": ("email", None),
+    CONTACT + "Telephones[]": ("phone", "Normalized"),
+    RESUME + "LanguageCompetencies[]": ("languages", "Language"),
+}
+STREAM_LIST_FIELDS = {f"{path}.{field}": key for path, (key, field) in STREAM_LISTS.items() if field}
+EVENT_TYPES = {"start_map": "object", "start_array": "array", "string": "string", "boolean": "boolean", "null": "null"}
+
+
+def stream_profile_file(json_file: str) -> Dict[str, Any]:
+    """
+    Same result as profile_file(), built from json_stream events instead of a
+    loaded document: required paths, summarize_resume fields and per-path
+    types are gathered as the file is read.
+    """
+    result = {"file": json_file, "ok": False, "error": None, "missing": [], "summary": {}, "paths": {}}
+    summary = {
+        "status": None, "message": None, "credits_used": None, "name": None,
+        "email": [], "phone": [], "highest_degree": None, "education_count": 0,
+        "years_experience": None, "positions_count": 0, "raw_skills_count": 0,
+        "normalized_skills_count": 0, "languages": [], "certifications_count": 0,
+    }
+    paths = {}
+    seen_required = set()
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            for path, event, value in iter_events(f):
+                if event in ("map_key", "end_map", "end_array"):
+                    continue
+                if not path:
+                    if event != "start_map":
+                        result["error"] = f"Top-level JSON is {EVENT_TYPES.get(event, 'number')}, expected object"
+                        return result
+                    continue
+
+                if event == "number":
+                    type_name = get_type_name(value)
+                else:
+                    type_name = EVENT_TYPES[event]
+                paths.setdefault(path, set()).add(type_name)
+
+                if path in REQUIRED_PATHS:
+                    seen_required.add(path)
+                if path in STREAM_COUNTS:
+                    summary[STREAM_COUNTS[path]] += 1
+                elif path in STREAM_LISTS:
+                    key, field = STREAM_LISTS[path]
+                    summary[key].append(None if field or event == "start_map" else value)
+                elif event not in ("start_map", "start_array"):
+                    if path in STREAM_SCALARS:
+                        summary[STREAM_SCALARS[path]] = value
+                    elif path in STREAM_LIST_FIELDS and summary[STREAM_LIST_FIELDS[path]]:
+                        summary[STREAM_LIST_FIELDS[path]][-1] = value
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    if summary["years_experience"]:
+        summary["years_experience"] = round(summary["years_experience"] / 12, 1)
+
+    result["ok"] = True
+    result["missing"] = [path for path in REQUIRED_PATHS if path not in seen_required]
+    result["summary"] = summary
+    result["paths"] = {path: sorted(types) for path, types in paths.items()}
+    return result
+
+
+def find_json_files(target: str) -> List[str]:
+    if os.path.isdir(target):
+        return sorted(str(p) for p in Path(target).rglob("*.json"))
+    return sorted(glob.glob(target, recursive=True))
+
+
+def is_bulk_target(target: str) -> bool:
+    return os.path.isdir(target) or any(c in target for c in "*?[")
+
+
+def aggregate_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    files = 0
+    parsed = 0
+    errors = []
+    missing = Counter()
+    path_files = Counter()
+    path_types = defaultdict(Counter)
+    statuses = Counter()
+    languages = Counter()
+    with_email = 0
+    with_phone = 0
+    numeric = defaultdict(list)
+
+    for result in results:
+        files += 1
+        if not result["ok"]:
+            errors.append({"file": result["file"], "error": result["error"]})
+            continue
+        parsed += 1
+        missing.update(result["missing"])
+        for path, types in result["paths"].items():
+            path_files[path] += 1
+            path_types[path].update(types)
+
+        summary = result["summary"]
+        statuses[str(summary.get("status"))] += 1
+        languages.update(lang for lang in summary.get("languages") or [] if lang)
+        with_email += bool(summary.get("email"))
+        with_phone += bool([p for p in summary.get("phone") or [] if p])
+        for field in NUMERIC_SUMMARY_FIELDS:
+            value = summary.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numeric[field].append(value)
+
+    fields = []
+    for path in sorted(path_files):
+        types = path_types[path]
+        non_null = [t for t in types if t != "null"]
+        fields.append({
+            "path": path,
+            "present_files": path_files[path],
+            "presence_rate": round(path_files[path] / parsed, 4) if parsed else 0,
+            "types": dict(sorted(types.items())),
+            "type_conflict": len(non_null) > 1,
+        })
+
+    return {
+        "files": files,
+        "parsed": parsed,
+        "parse_errors": errors,
+        "missing_required": {path: missing[path] for path in REQUIRED_PATHS},
+        "fields": fields,
+        "type_conflicts": [f["path"] for f in fields if f["type_conflict"]],
+        "summary_stats": {
+            "status": dict(statuses.most_common()),
+            "with_email_rate": round(with_email / parsed, 4) if parsed else 0,
+            "with_phone_rate": round(with_phone / parsed, 4) if parsed else 0,
+            "languages": dict(languages.most_common()),
+            **{
+                field: {
+                    "files": len(values),
+                    "min": min(values),
+                    "max": max(values),
+                    "mean": round(sum(values) / len(values), 2),
+                }
+                for field, values in numeric.items()
+            },
+        },
+    }
+
+
+def write_reports(prefix: str, results: List[Dict[str, Any]], report: Dict[str, Any]) -> None:
+    summary_fields = ["status", "credits_used", "name", "highest_degree", "years_experience"] + [
+        f for f in NUMERIC_SUMMARY_FIELDS if f not in ("credits_used", "years_experience")
+    ]
+    with open(f"{prefix}_files.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "ok", "error", "missing_required"] + summary_fields)
+        for result in results:
+            summary = result["summary"]
+            writer.writerow(
+                [result["file"], result["ok"], result["error"] or "", ";".join(result["missing"])]
+                + [summary.get(field) for field in summary_fields]
+            )
+
+    with open(f"{prefix}_fields.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["path", "present_files", "presence_rate", "types", "type_conflict"])
+        for field in report["fields"]:
+            types = ";".join(f"{t}:{n}" for t, n in field["types"].items())
+            writer.writerow([field["path"], field["present_files"], field["presence_rate"], types, field["type_conflict"]])
+
+    with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main_bulk(target: str, workers: Optional[int], prefix: str, stream: bool = False) -> None:
+    report_file = os.path.abspath(f"{prefix}.json")
+    files = [f for f in find_json_files(target) if os.path.abspath(f) != report_file]
+    if not files:
+        print(f"No JSON files found for {target}")
+        sys.exit(1)
+
+    print(f"Validating {len(files)} files...")
+    file_rows = []
+
+    def tracked(results):
+        # Per-file path sets only feed the aggregate and are not kept
+        for i, result in enumerate(results, 1):
+            file_rows.append({key: value for key, value in result.items() if key != "paths"})
+            if i % 500 == 0:
+                print(f"  {i}/{len(files)}")
+            yield result
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        report = aggregate_results(tracked(pool.map(stream_profile_file if stream else profile_file, files, chunksize=16)))
+    write_reports(prefix, file_rows, report)
+
+    print("=" * 60)
+    print("TEXTKERNEL BULK VALIDATION")
+    print("=" * 60)
+    print(f"  Files: {report['files']}, parsed: {report['parsed']}, parse errors: {len(report['parse_errors'])}")
+    for path, count in report["missing_required"].items():
+        if count:
+            print(f"  [WARNING] {path} missing in {count} files")
+    print(f"  Fields seen: {len(report['fields'])}, type conflicts: {len(report['type_conflicts'])}")
+    print(f"  Reports: {prefix}_files.csv, {prefix}_fields.csv, {prefix}.json")
+
+
 def main():
     if len(sys.argv) < 2:
         print(__doc__)
         sys.exit(1)
-    
-    extract_mode = "--extract-schema" in sys.argv
-    json_file = sys.argv[-1]
+
+    parser = argparse.ArgumentParser(description="Validate Textkernel resume parser JSON output.")
+    parser.add_argument("target", help="JSON file, directory or glob")
+    parser.add_argument("--extract-schema", action="store_true", help="Print the schema tree (single file)")
+    parser.add_argument("--workers", type=int, help="Worker processes for directory / glob mode")
+    parser.add_argument("--stream", action="store_true", help="Parse files incrementally (bulk mode)")
+    parser.add_argument("--report", default="textkernel_validation_report", help="Report file prefix (bulk mode)")
+    args = parser.parse_args()
+
+    if is_bulk_target(args.target):
+        main_bulk(args.target, args.workers, args.report, args.stream)
+        return
+
+    extract_mode = args.extract_schema
+    json_file = args.target
     
     try:
         with open(json_file, 'r', encoding='utf-8') as f: